@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+AtomicFile.py
+Purpose:
+    Write files and folders that other processes read while they are
+    being replaced: the merged data, its version stamp, the binary
+    caches, the pre-rendered charts, the map boundaries and the
+    history. The content is written to a uniquely named temporary
+    file in the target's folder and renamed over the target, so a
+    reader sees the old or the new file and two writers of the same
+    target never share a temporary file.
+
+Python Group C2
+    @author 1: Anni Kang;          andrew id: annik
+    @author 2: Harshita Agrawal;   andrew id: hagrawa2
+    @author 3: Yingyuan Lin;       andrew id: yingyual
+    @author 4: Zheyu Yan;          andrew id: zheyuyan
+"""
+
+import contextlib
+import os
+import shutil
+import tempfile
+
+# temporary files are created readable by the owner only, the renamed file gets the usual permissions
+_umask = os.umask(0)
+os.umask(_umask)
+FILE_MODE = 0o666 & ~_umask
+
+
+# open a temporary file next to path for writing and rename it over path when the block succeeds
+# mode is 'w' for text or 'wb' for bytes, on error the temporary file is removed and path is untouched
+@contextlib.contextmanager
+def atomic_write(path, mode = 'w', encoding = 'utf-8', newline = None):
+    directory = os.path.dirname(os.path.abspath(path))
+    binary = 'b' in mode
+    file = tempfile.NamedTemporaryFile(mode, dir = directory, prefix = os.path.basename(path) + '.',
+                                       suffix = '.tmp', delete = False,
+                                       encoding = None if binary else encoding,
+                                       newline = None if binary else newline)
+    try:
+        with file:
+            yield file
+        os.chmod(file.name, FILE_MODE)
+        os.replace(file.name, path)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.remove(file.name)
+        raise
+
+# create a temporary folder next to path and move it to path when the block succeeds
+# an existing folder at path is replaced, on error the temporary folder is removed
+@contextlib.contextmanager
+def atomic_directory(path):
+    parent = os.path.dirname(os.path.abspath(path))
+    os.makedirs(parent, exist_ok = True)
+    temp = tempfile.mkdtemp(dir = parent, prefix = os.path.basename(path) + '.', suffix = '.tmp')
+    try:
+        yield temp
+        os.chmod(temp, 0o777 & ~_umask)
+        shutil.rmtree(path, ignore_errors = True)
+        os.replace(temp, path)
+    except BaseException:
+        shutil.rmtree(temp, ignore_errors = True)
+        raise
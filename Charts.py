@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Charts.py
+Purpose:
+    Build the seaborn charts of the MoveWise dashboard on explicit
+    matplotlib Figure objects and cache the rendered PNG bytes.
+    The charts only depend on the chart kind, the selected states,
+    the industry and the dataset version, so a rendered chart is
+    kept in a bounded LRU cache shared by all sessions of the
+    process. matplotlib and seaborn are only imported when a chart
+    has to be drawn, not when it is served from the cache.
+    `python Charts.py` pre-renders the single-state charts
+    and the common state pairs to disk ahead of time.
+
+Python Group C2
+    @author 1: Anni Kang;          andrew id: annik
+    @author 2: Harshita Agrawal;   andrew id: hagrawa2
+    @author 3: Yingyuan Lin;       andrew id: yingyual
+    @author 4: Zheyu Yan;          andrew id: zheyuyan
+"""
+
+import argparse
+import io
+import itertools
+import os
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+from AtomicFile import atomic_write
+from DataStore import DATA_FILE, load_dataset, version_dir
+from Profiling import section
+from Statistics import COST_ATTRIBUTES
+
+# attributes shown as box plots on the Overview tab, Misc. is left out
+DISTRIBUTION_ATTRIBUTES = COST_ATTRIBUTES[:-1]
+
+# same resolution and cropping that st.pyplot uses
+CHART_DPI = 200
+
+# number of rendered charts kept in memory
+MAX_CHARTS = 256
+
+# states with the most occupied housing units whose pairs are pre-rendered
+COMMON_STATE_COUNT = 10
+
+
+# thread-safe LRU cache of rendered charts, keyed by chart_key
+class ChartCache:
+    def __init__(self, max_entries = MAX_CHARTS):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._charts = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            png = self._charts.get(key)
+            if png is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._charts.move_to_end(key)
+            return png
+
+    def put(self, key, png):
+        with self._lock:
+            self._charts[key] = png
+            self._charts.move_to_end(key)
+            while len(self._charts) > self.max_entries:
+                self._charts.popitem(last = False)
+
+    def clear(self):
+        with self._lock:
+            self._charts.clear()
+
+    def __len__(self):
+        return len(self._charts)
+
+
+# one chart cache per process, shared by all sessions
+chart_cache = ChartCache()
+
+
+# return the cache key of a chart
+def chart_key(kind, states, industry, version, options = ()):
+    return kind, tuple(states), industry, version, tuple(options)
+
+# return the file a pre-rendered chart is stored in
+def chart_file(key):
+    kind, states, industry, version, options = key
+    name = '-'.join([kind, *states, industry or 'all', *options]).replace(' ', '_')
+    return os.path.join(version_dir(version), 'charts', name + '.png')
+
+# render a figure to png bytes
+def figure_to_png(fig):
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format = 'png', dpi = CHART_DPI, bbox_inches = 'tight')
+    return buffer.getvalue()
+
+# return the png of a chart from memory, then from the pre-rendered files, rendering it as a last resort
+def render_chart(key, build, cache = chart_cache):
+    png = cache.get(key)
+    if png is not None:
+        return png
+    path = chart_file(key)
+    if os.path.exists(path):
+        with open(path, 'rb') as file:
+            png = file.read()
+    else:
+        # render outside the cache lock so sessions can render different charts at once
+        with section('draw ' + key[0]):
+            png = figure_to_png(build())
+    cache.put(key, png)
+    return png
+
+# import the plotting stack on the first chart that is drawn
+def _plotting():
+    import seaborn as sns
+    from matplotlib.figure import Figure
+    return sns, Figure
+
+# plot various living statistics by state
+def living_cost_summary_figure(df, state):
+    sns, Figure = _plotting()
+    state_data = df[df['State'] == state]
+    state_melted = pd.melt(state_data, id_vars=['State'], value_vars=COST_ATTRIBUTES)
+    fig = Figure(figsize=(6, 4))
+    ax = fig.subplots()
+    sns.barplot(data=state_melted, x='variable', y='value', alpha=0.8, ax=ax)
+    ax.set_title(f'Living cost summary for {state}')
+    ax.set_ylabel('Value')
+    ax.set_xlabel('Metrics')
+    ax.tick_params(axis='x', labelrotation=45)
+    fig.tight_layout()
+    return fig
+
+# create a barplot that displays the difference in statistics between two states
+def state_comparison_figure(df, state1, state2):
+    sns, Figure = _plotting()
+    selected_state = df[df['State'].isin([state1, state2])]
+    state_melted = pd.melt(selected_state, id_vars=['State'], value_vars=COST_ATTRIBUTES)
+    # State is categorical, only the two selected states get a bar
+    order = list(dict.fromkeys([state1, state2]))
+    fig = Figure(figsize=(10, 10))
+    axes = fig.subplots(nrows=2, ncols=1)
+    sns.barplot(data=selected_state, x='State', y='Median Rent', order=order, ax=axes[0], alpha=0.8)
+    axes[0].set_title(f'Median Rent Comparison Between {state1} and {state2}')
+    plot = sns.barplot(data=state_melted, x='State', y='value', hue='variable', order=order, ax=axes[1], alpha=0.8)
+    axes[1].set_title(f'Living Cost Comparision Between {state1} and {state2}')
+    plot.legend(loc='upper left', bbox_to_anchor=(1, 1), ncol=1)
+    axes[1].set_ylabel('Value')
+    axes[1].set_xlabel('Metrics')
+    axes[1].tick_params(axis='x', labelrotation=45)
+    fig.tight_layout()
+    return fig
+
+# plot a box plot of the distribution of every attribute in stats, a Statistics.DistributionStats
+def distribution_figure(stats):
+    sns, Figure = _plotting()
+    # height in inches for each subplot
+    height_per_plot = 4
+    fig = Figure(figsize=(10, height_per_plot * len(stats.attributes)))
+    axes = fig.subplots(nrows=len(stats.attributes), ncols=1, squeeze=False)[:, 0]
+    for counter, attribute in enumerate(stats.attributes):
+        sns.boxplot(stats.values[attribute], ax=axes[counter])
+        axes[counter].set_title(f'Distribution of {attribute}')
+        # label the outliers found by the statistics stage
+        for state, value in zip(*stats.outlier_values(attribute)):
+            axes[counter].text(0.3, value, state, ha='center')
+    fig.tight_layout()
+    return fig
+
+# return the png of the living cost summary of a state
+def render_living_cost_summary(df, state, version):
+    key = chart_key('living_cost_summary', [state], None, version)
+    return render_chart(key, lambda: living_cost_summary_figure(df, state))
+
+# return the png of the comparison between two states
+def render_state_comparison(df, state1, state2, version):
+    key = chart_key('state_comparison', [state1, state2], None, version)
+    return render_chart(key, lambda: state_comparison_figure(df, state1, state2))
+
+# return the png of the distribution box plots
+def render_distribution(stats, version):
+    key = chart_key('distribution', [], None, version, stats.attributes)
+    return render_chart(key, lambda: distribution_figure(stats))
+
+# return the ordered pairs of the states with the most occupied housing units
+def common_state_pairs(df, count = COMMON_STATE_COUNT):
+    states = df.nlargest(count, 'Occupied Housing Units')['State']
+    return list(itertools.permutations(states, 2))
+
+# write the png of a chart to its pre-rendered file
+def _write_chart(key, build):
+    path = chart_file(key)
+    os.makedirs(os.path.dirname(path), exist_ok = True)
+    with atomic_write(path, 'wb') as file:
+        file.write(figure_to_png(build()))
+
+# pre-render the charts of every state, the common state pairs and the distribution to disk
+def prerender(dataset, pairs = None):
+    df = dataset.living_housing_info
+    version = dataset.version
+    if pairs is None:
+        pairs = common_state_pairs(df)
+
+    count = 0
+    for state in df['State']:
+        key = chart_key('living_cost_summary', [state], None, version)
+        _write_chart(key, lambda: living_cost_summary_figure(df, state))
+        count += 1
+    for state1, state2 in pairs:
+        key = chart_key('state_comparison', [state1, state2], None, version)
+        _write_chart(key, lambda: state_comparison_figure(df, state1, state2))
+        count += 1
+    stats = dataset.distribution(DISTRIBUTION_ATTRIBUTES)
+    key = chart_key('distribution', [], None, version, stats.attributes)
+    _write_chart(key, lambda: distribution_figure(stats))
+    return count + 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description = 'Pre-render the dashboard charts for the current dataset.')
+    parser.add_argument('--data', default = DATA_FILE)
+    parser.add_argument('--common-states', type = int, default = COMMON_STATE_COUNT,
+                        help = 'pre-render every pair of this many most populous states')
+    args = parser.parse_args()
+
+    dataset = load_dataset(args.data)
+    pairs = common_state_pairs(dataset.living_housing_info, args.common_states)
+    count = prerender(dataset, pairs)
+    print(f'pre-rendered {count} charts to {os.path.join(version_dir(dataset.version), "charts")}')
+
+
+if __name__ == "__main__":
+    main()
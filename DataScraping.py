@@ -1,12 +1,22 @@
 """
 DataScraping.py
-Purpose: 
-    Read in data sources about employment, wage, cost of living, 
-    and house price by state. Scraped 2 sources from web and 
+Purpose:
+    Read in data sources about employment, wage, cost of living,
+    and house price by state. Scraped 2 sources from web and
     manually entered data as csv file for employment and wage.
-    Cleaned and merged three data sources as csv to be imported 
+    Cleaned and merged three data sources as csv to be imported
     by MoveWise.py for EDA and GUI.
-    
+    The build is a staged pipeline: every stage records a content
+    hash of its inputs and outputs and is only rerun when they
+    changed. The merged data is checked against Schema.py and
+    written atomically with its declared dtypes, together with a
+    version stamp the dashboard caches on. Every merge that changed
+    the data is also appended to the history (History.py), so older
+    vintages stay available for trend queries.
+    The web pages are fetched concurrently over a pooled session
+    with conditional requests backed by an on-disk cache, or read
+    from saved html fixtures with `--fixtures DIR`.
+
 Python Group C2
     @author 1: Anni Kang;          andrew id: annik
     @author 2: Harshita Agrawal;   andrew id: hagrawa2
@@ -14,101 +24,297 @@ Python Group C2
     @author 4: Zheyu Yan;          andrew id: zheyuyan
 """
 
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
 import requests
-from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import pandas as pd
-import os
+
+from AtomicFile import atomic_write
+from History import HISTORY_DIR, append_snapshot, read_manifest
+from Schema import apply_schema, read_typed_csv
+from TableExtract import read_table, to_frame
+
+# web pages scraped for the merged data, saved fixtures are named <name>.html
+SOURCES = {
+    'rental': "https://wisevoter.com/state-rankings/average-rent-by-state/",
+    'cost_of_living': "https://meric.mo.gov/data/cost-living-data-series",
+}
+WAGE_FILE = "EmploymentandWage_updated.csv"
+RENTAL_FILE = 'rental_data.csv'
+COST_OF_LIVING_FILE = 'cost_of_living.csv'
+MERGED_FILE = "merged_data.csv"
+
+# regions left out of the merged data, and summary rows of the scraped tables
+EXCLUDED_REGIONS = ['Puerto Rico', 'United States', 'U.S.', 'Total', 'Average', '']
+
+# stage hashes of the last run and the version stamp of the merged data
+PIPELINE_STATE_FILE = '.pipeline_state.json'
+VERSION_FILE = 'merged_data.version'
+# bump when the parsing or cleaning code changes so that every stage reruns
+PIPELINE_VERSION = 3
+
+# responses and their ETag/Last-Modified validators are kept here between runs
+HTTP_CACHE_DIR = '.http_cache'
+# seconds to wait for a site to connect and to send data
+TIMEOUT = (5, 30)
+RETRIES = 3
+
+
+# the html of a source page and where it came from
+class Page:
+    def __init__(self, name, text, origin, changed, error = None):
+        self.name = name
+        self.text = text
+        # 'network', 'cache' (304 Not Modified), 'stale' (site failed, last good copy) or 'fixture'
+        self.origin = origin
+        # False when the text is the cached copy
+        self.changed = changed
+        # the request error behind a stale page
+        self.error = error
+
 
 # Scraping and Loading Data
-# read in average rent by state information from web scraping
-url = "https://wisevoter.com/state-rankings/average-rent-by-state/"
-response = requests.get(url)
-# scrape data 
-if response.status_code == 200:
-    soup = BeautifulSoup(response.text, 'html.parser')
-    table = soup.find('table', {'class': 'shdb-on-page-table'})
-    data = []
-
-    for row in table.find_all('tr')[1:]:
-        columns = row.find_all('td')
-        state = columns[1].text.strip()
-        median_rent_price = int(columns[2].text.strip().replace('$', '').replace(',', ''))
-        vacancy_rate = float(columns[3].text.strip().replace('%', ''))
-        housing_units = int(columns[4].text.strip().replace(',', ''))
-        median_home_price_text = columns[5].text.strip().replace('$', '').replace(',', '')
-        median_home_price = int(median_home_price_text) if median_home_price_text else None
-
-        data.append([state, median_rent_price, vacancy_rate, housing_units, median_home_price])
+# create a session with a connection pool per host and retries on transient errors
+def make_session(pool_size = len(SOURCES), retries = RETRIES):
+    session = requests.Session()
+    retry = Retry(total = retries, backoff_factor = 0.5,
+                  status_forcelist = [429, 500, 502, 503, 504], allowed_methods = ['GET'])
+    adapter = HTTPAdapter(pool_connections = pool_size, pool_maxsize = pool_size, max_retries = retry)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+# return the cached body and validators of a source, (None, {}) if never fetched
+def _read_cached(cache_dir, name):
+    try:
+        with open(os.path.join(cache_dir, name + '.html'), encoding = 'utf-8') as file:
+            text = file.read()
+        with open(os.path.join(cache_dir, name + '.json'), encoding = 'utf-8') as file:
+            validators = json.load(file)
+    except (OSError, ValueError):
+        return None, {}
+    return text, validators
+
+# store the body and validators of a response, replacing the old copy atomically
+def _write_cached(cache_dir, name, text, validators):
+    os.makedirs(cache_dir, exist_ok = True)
+    for suffix, content in (('.html', text), ('.json', json.dumps(validators))):
+        with atomic_write(os.path.join(cache_dir, name + suffix)) as file:
+            file.write(content)
+
+# fetch one page with a conditional request, falling back to the cached copy if the site fails
+def fetch_page(session, name, url, cache_dir = HTTP_CACHE_DIR, timeout = TIMEOUT):
+    cached_text, validators = _read_cached(cache_dir, name)
+    headers = {}
+    if cached_text is not None:
+        if validators.get('etag'):
+            headers['If-None-Match'] = validators['etag']
+        if validators.get('last_modified'):
+            headers['If-Modified-Since'] = validators['last_modified']
+
+    try:
+        response = session.get(url, headers = headers, timeout = timeout)
+        if response.status_code == 304 and cached_text is not None:
+            return Page(name, cached_text, 'cache', False)
+        response.raise_for_status()
+    except requests.RequestException as error:
+        if cached_text is None:
+            raise
+        # a slow or broken site should not stop the refresh, use the last good copy and report why
+        return Page(name, cached_text, 'stale', False, error)
+
+    text = response.text
+    validators = {'etag': response.headers.get('ETag'), 'last_modified': response.headers.get('Last-Modified')}
+    _write_cached(cache_dir, name, text, validators)
+    return Page(name, text, 'network', text != cached_text)
+
+# read a page from a saved html fixture
+def read_fixture(fixtures_dir, name):
+    with open(os.path.join(fixtures_dir, name + '.html'), encoding = 'utf-8') as file:
+        return Page(name, file.read(), 'fixture', True)
+
+# fetch all source pages concurrently, or read them from fixtures_dir when given
+def fetch_pages(sources = SOURCES, fixtures_dir = None, cache_dir = HTTP_CACHE_DIR, session = None):
+    if fixtures_dir:
+        return {name: read_fixture(fixtures_dir, name) for name in sources}
+    session = session or make_session(len(sources))
+    with ThreadPoolExecutor(max_workers = len(sources)) as executor:
+        futures = {name: executor.submit(fetch_page, session, name, url, cache_dir)
+                   for name, url in sources.items()}
+        return {name: future.result() for name, future in futures.items()}
+
+# read in average rent by state information from the scraped page
+def parse_rental_data(html):
+    # only the ranking table is parsed, skip its header row and the rank column
+    rows = read_table(html, table_class = 'shdb-on-page-table')[1:]
     # select useful columns for analysis
     columns = ['State', 'Median Rent Price ($)', 'Rental Vacancy Rate (%)', 'Occupied Housing Units', 'Median Home Price($)']
-    rent_by_state = pd.DataFrame(data, columns=columns)
+    rent_by_state = to_frame([row[1:6] for row in rows], columns,
+                             numeric = columns[1:], integer = ['Median Rent Price ($)', 'Occupied Housing Units'])
     # sort data by state names alphabetically
     rent_by_state = rent_by_state.sort_values(by='State', ascending=True)
     # reset index
-    rent_by_state = rent_by_state.reset_index()
-    rent_by_state = rent_by_state.drop(columns = 'index')
-    # store scraped data 
-    rent_by_state.to_csv('rental_data.csv', index=False)
-
-
-
-# read in cost of living per state data from web scraping
-url = "https://meric.mo.gov/data/cost-living-data-series"
-response = requests.get(url)
-soup = BeautifulSoup(response.text, 'html.parser')
-table = soup.find('table')
-table_div = soup.find('div', {'class': 'table-responsive'})
-if table_div:
-    table = table_div.find('table')
-    headers = [th.text.strip() for th in table.find_all('th')]
-    # Extract table rows
-    rows = table.find_all('tr')[1:]  # Exclude header row
-
-    data = []
-    for row in rows:
-        columns = row.find_all('td')
-        row_data = {headers[i]: columns[i].text.strip() for i in range(len(columns))}
-        data.append(row_data)
-
-    # Convert to DataFrame
-    cost_of_living = pd.DataFrame(data)
-    file_path = os.path.abspath('cost_of_living.csv')
-    cost_of_living.to_csv(file_path, index=False)
-
-# read in employment data by state information from manually cleaned csv
-wage_by_state = pd.read_csv("EmploymentandWage_updated.csv")
-
-# sort cost_of_living by state alphabetically 
-cost_of_living = cost_of_living.sort_values(["State"], ascending=True)
-# delete rows for total sum (index 52) and Puerto Rico (index 27) 
-cost_of_living = cost_of_living.drop(index=52)
-cost_of_living = cost_of_living.drop(index = 27)
-# drop unnecessary columns
-cost_of_living = cost_of_living.drop(columns=["Rank"])
-# reset index
-cost_of_living = cost_of_living.reset_index()
-cost_of_living = cost_of_living.drop(columns = "index")
-
-# drop rows for Puerto Rico (index 39) and reset index 
-wage_by_state = wage_by_state.drop(index = 39)
-wage_by_state = wage_by_state.reset_index()
-wage_by_state = wage_by_state.drop(columns = "index")
-wage_by_state
-
-# merge 3 dataframes by states
-merged_df = pd.merge(rent_by_state, cost_of_living, on='State')
-merged_df = pd.merge(wage_by_state, merged_df, on='State')
-
-
-# Data Cleaning
-# rename column names that are too long
-merged = merged_df.rename(columns={"Median Hourly Wage ($)": "Median Hourly Wage", 
-"Mean Hourly Wage ($)": "Mean Hourly Wage","Annual Mean Wage ($)": "Annual Mean Wage", 
-"Median Rent Price ($)": "Median Rent", "Rental Vacancy Rate (%)": "Rental Vacancy", 
-"Median Home Price($)": "Median Home Price" })
-
-# Fill Nan values
-merged['Median Home Price'] = merged["Median Home Price"].fillna(method = 'ffill')
-
-# Export final data
-merged.to_csv("merged_data.csv", sep=',', index=False, encoding='utf-8')
+    rent_by_state = rent_by_state.reset_index(drop = True)
+    return rent_by_state
+
+# read in cost of living per state data from the scraped page
+def parse_cost_of_living(html):
+    # the data table sits in the responsive container, the first row holds the headers
+    rows = read_table(html, container_class = 'table-responsive')
+    headers = rows[0]
+    return to_frame(rows[1:], headers, numeric = [header for header in headers if header != 'State'])
+
+# clean the three sources and merge them by state
+def merge_sources(rent_by_state, cost_of_living, wage_by_state):
+    # keep states and DC only, the tables also hold Puerto Rico and summary rows
+    cost_of_living = cost_of_living[~cost_of_living['State'].isin(EXCLUDED_REGIONS)]
+    wage_by_state = wage_by_state[~wage_by_state['State'].isin(EXCLUDED_REGIONS)]
+    rent_by_state = rent_by_state[~rent_by_state['State'].isin(EXCLUDED_REGIONS)]
+    # sort cost_of_living by state alphabetically and drop unnecessary columns
+    cost_of_living = cost_of_living.sort_values(["State"], ascending=True)
+    cost_of_living = cost_of_living.drop(columns=["Rank"])
+    cost_of_living = cost_of_living.reset_index(drop = True)
+    wage_by_state = wage_by_state.reset_index(drop = True)
+
+    # merge 3 dataframes by states
+    merged_df = pd.merge(rent_by_state, cost_of_living, on='State')
+    merged_df = pd.merge(wage_by_state, merged_df, on='State')
+
+
+    # Data Cleaning
+    # rename column names that are too long
+    merged = merged_df.rename(columns={"Median Hourly Wage ($)": "Median Hourly Wage",
+    "Mean Hourly Wage ($)": "Mean Hourly Wage","Annual Mean Wage ($)": "Annual Mean Wage",
+    "Median Rent Price ($)": "Median Rent", "Rental Vacancy Rate (%)": "Rental Vacancy",
+    "Median Home Price($)": "Median Home Price" })
+
+    # Fill Nan values
+    merged['Median Home Price'] = merged["Median Home Price"].ffill()
+    return merged
+
+# Incremental Pipeline
+# return a short sha256 of a string or bytes
+def content_hash(content):
+    if isinstance(content, str):
+        content = content.encode('utf-8')
+    return hashlib.sha256(content).hexdigest()[:16]
+
+# return the content hash of a file, None if it does not exist
+def file_hash(path):
+    try:
+        with open(path, 'rb') as file:
+            return content_hash(file.read())
+    except FileNotFoundError:
+        return None
+
+# write a dataframe as csv so that readers never see a partial file
+def write_csv_atomic(df, path):
+    with atomic_write(path, newline = '') as file:
+        df.to_csv(file, sep=',', index=False)
+
+# write the version stamp of the merged data, matched against the file's stat by DataStore
+def write_version_stamp(path, inputs, version_file = VERSION_FILE):
+    stat = os.stat(path)
+    stamp = {'version': file_hash(path), 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns,
+             'built': time.strftime('%Y-%m-%dT%H:%M:%S'), 'inputs': inputs}
+    with atomic_write(version_file) as file:
+        json.dump(stamp, file, indent = 2)
+    return stamp
+
+# add the merged data to the history unless its stamped version is already there, return the new vintage
+# merged_data.csv only holds the latest data, the history keeps every vintage
+def record_history(history_dir = HISTORY_DIR, path = MERGED_FILE, version_file = VERSION_FILE):
+    try:
+        with open(version_file, encoding = 'utf-8') as file:
+            stamp = json.load(file)
+    except (OSError, ValueError):
+        return None
+    if any(vintage['version'] == stamp['version'] for vintage in read_manifest(history_dir)['vintages']):
+        return None
+    # a file edited after the stamp was written is not the stamped version
+    if file_hash(path) != stamp['version']:
+        return None
+    return append_snapshot(read_typed_csv(path), stamp['version'], stamp['built'], history_dir)
+
+# read the stage hashes of the last run
+def read_pipeline_state(path = PIPELINE_STATE_FILE):
+    try:
+        with open(path, encoding = 'utf-8') as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return {}
+
+# save the stage hashes of this run
+def write_pipeline_state(state, path = PIPELINE_STATE_FILE):
+    with atomic_write(path) as file:
+        json.dump(state, file, indent = 2)
+
+# run a stage unless its inputs and outputs match the last run, return whether it ran
+def run_stage(state, name, inputs, outputs, build, force = False):
+    inputs = dict(inputs, pipeline = PIPELINE_VERSION)
+    recorded = state.get(name, {})
+    current = {path: file_hash(path) for path in outputs}
+    if not force and recorded.get('inputs') == inputs and recorded.get('outputs') == current \
+            and None not in current.values():
+        return False
+    build()
+    state[name] = {'inputs': inputs, 'outputs': {path: file_hash(path) for path in outputs}}
+    return True
+
+# fetch the pages and rebuild the stages whose inputs changed, return the names of the stages that ran
+def run_pipeline(fixtures_dir = None, cache_dir = HTTP_CACHE_DIR, force = False, history_dir = HISTORY_DIR):
+    state = read_pipeline_state()
+    pages = fetch_pages(fixtures_dir = fixtures_dir, cache_dir = cache_dir)
+    for page in pages.values():
+        if page.origin == 'stale':
+            print(f'{page.name}: stale, fetch failed ({page.error}), using the last good copy', file = sys.stderr)
+        else:
+            print(f'{page.name}: {page.origin}' + ('' if page.changed else ' (not modified)'))
+
+    ran = []
+    # store scraped data
+    if run_stage(state, 'rental', {'page': content_hash(pages['rental'].text)}, [RENTAL_FILE],
+                 lambda: write_csv_atomic(parse_rental_data(pages['rental'].text), RENTAL_FILE), force):
+        ran.append('rental')
+    if run_stage(state, 'cost_of_living', {'page': content_hash(pages['cost_of_living'].text)}, [COST_OF_LIVING_FILE],
+                 lambda: write_csv_atomic(parse_cost_of_living(pages['cost_of_living'].text), COST_OF_LIVING_FILE), force):
+        ran.append('cost_of_living')
+
+    # merge the stored tables with the employment data from the manually cleaned csv
+    merge_inputs = {path: file_hash(path) for path in (RENTAL_FILE, COST_OF_LIVING_FILE, WAGE_FILE)}
+    def build_merged():
+        merged = merge_sources(pd.read_csv(RENTAL_FILE), pd.read_csv(COST_OF_LIVING_FILE), pd.read_csv(WAGE_FILE))
+        # a table that does not match the schema raises SchemaError and leaves the old file in place
+        write_csv_atomic(apply_schema(merged), MERGED_FILE)
+        write_version_stamp(MERGED_FILE, merge_inputs)
+    if run_stage(state, 'merge', merge_inputs, [MERGED_FILE, VERSION_FILE], build_merged, force):
+        ran.append('merge')
+    # checked on every run, so a deleted or new history folder gets the current data as well
+    if record_history(history_dir):
+        ran.append('history')
+
+    write_pipeline_state(state)
+    return ran
+
+def main():
+    parser = argparse.ArgumentParser(description = 'Scrape the data sources and build merged_data.csv.')
+    parser.add_argument('--fixtures', help = 'read the pages from <name>.html files in this directory instead of the web')
+    parser.add_argument('--cache-dir', default = HTTP_CACHE_DIR)
+    parser.add_argument('--force', action = 'store_true', help = 'rebuild every stage')
+    parser.add_argument('--history-dir', default = HISTORY_DIR, help = 'folder the vintages of the merged data are kept in')
+    args = parser.parse_args()
+
+    ran = run_pipeline(args.fixtures, args.cache_dir, args.force, args.history_dir)
+    print('rebuilt: ' + (', '.join(ran) if ran else 'nothing, all stages up to date'))
+
+
+if __name__ == "__main__":
+    main()
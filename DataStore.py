@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+DataStore.py
+Purpose:
+    Data-access layer for the MoveWise dashboard. The merged data
+    file is loaded once per process and shared by every Streamlit
+    rerun and session. The cache is keyed on the file's mtime and
+    content hash, and the merged table together with its derived
+    views is stored as Parquet so that a fresh process does not
+    need to parse the csv again.
+
+Python Group C2
+    @author 1: Anni Kang;          andrew id: annik
+    @author 2: Harshita Agrawal;   andrew id: hagrawa2
+    @author 3: Yingyuan Lin;       andrew id: yingyual
+    @author 4: Zheyu Yan;          andrew id: zheyuyan
+"""
+
+import hashlib
+import json
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+from AtomicFile import atomic_write
+from Destinations import DestinationRanker
+from Schema import DECIMALS, KEY_COLUMNS, read_typed_csv
+from Statistics import distribution_stats
+
+DATA_FILE = "merged_data.csv"
+CACHE_DIR = ".movewise_cache"
+# bump when the derived views change so that old binary caches are not reused
+CACHE_FORMAT = 3
+
+# columns that differ between the industry rows of a state
+JOB_COLUMNS = ['Industry', 'Employment', 'Median Hourly Wage', 'Mean Hourly Wage', 'Annual Mean Wage']
+
+# employment and wage metrics ranked across all regions of an industry
+RANK_METRICS = ['Employment', 'Median Hourly Wage', 'Mean Hourly Wage', 'Annual Mean Wage']
+
+# merged data columns and the StateProfile fields they are read into
+PROFILE_FIELDS = {
+    'State': 'state', 'Industry': 'industry', 'Employment': 'employment',
+    'Median Hourly Wage': 'median_hourly_wage', 'Mean Hourly Wage': 'mean_hourly_wage',
+    'Annual Mean Wage': 'annual_mean_wage', 'Median Rent': 'median_rent',
+    'Rental Vacancy': 'rental_vacancy', 'Occupied Housing Units': 'occupied_housing_units',
+    'Median Home Price': 'median_home_price', 'Index': 'index', 'Grocery': 'grocery',
+    'Housing': 'housing', 'Utilities': 'utilities', 'Transportation': 'transportation',
+    'Health': 'health', 'Misc.': 'misc',
+}
+
+# derived views stored next to the merged table in the binary cache
+VIEWS = ['data', 'living_housing_info', 'rank_table']
+
+# one loaded dataset per csv path, shared by all sessions of the process
+_datasets = {}
+_lock = threading.Lock()
+
+
+# all statistics of one state and industry, read by the display functions
+class StateProfile:
+    __slots__ = tuple(PROFILE_FIELDS.values())
+
+    def __init__(self, *values):
+        for field, value in zip(self.__slots__, values):
+            setattr(self, field, value)
+
+    def __repr__(self):
+        return f'StateProfile({self.state!r}, {self.industry!r})'
+
+
+# (state, industry) -> StateProfile lookup backed by the column arrays of the merged table
+# a (state code, industry code) matrix holds the row of every pair, -1 where missing,
+# and profiles are only built when they are read
+class ProfileStore:
+    def __init__(self, data):
+        states = data['State'].astype('category')
+        industries = data['Industry'].astype('category')
+        self.states = list(states.cat.categories)
+        self.industries = list(industries.cat.categories)
+        self._state_codes = {state: code for code, state in enumerate(self.states)}
+        self._industry_codes = {industry: code for code, industry in enumerate(self.industries)}
+        self.rows = np.full((len(self.states), len(self.industries)), -1, dtype = np.int32)
+        self.rows[states.cat.codes.to_numpy(), industries.cat.codes.to_numpy()] = np.arange(len(data), dtype = np.int32)
+        # shared by every session, so no session may write to it
+        self.rows.flags.writeable = False
+        # numeric columns are views of the table, not copies, with the decimals of their schema
+        self._columns = [(data[column].to_numpy(), DECIMALS.get(column))
+                         for column in PROFILE_FIELDS if column not in KEY_COLUMNS]
+
+    # return the row of (state, industry) in the merged table, -1 if missing
+    def row(self, state, industry):
+        state_code = self._state_codes.get(state)
+        industry_code = self._industry_codes.get(industry)
+        if state_code is None or industry_code is None:
+            return -1
+        return int(self.rows[state_code, industry_code])
+
+    def __getitem__(self, key):
+        row = self.row(*key)
+        if row < 0:
+            raise KeyError(key)
+        values = []
+        for column, decimals in self._columns:
+            # item converts the numpy value to a plain python number, rounding drops the float32 noise
+            value = column[row].item()
+            values.append(value if decimals is None else round(value, decimals))
+        return StateProfile(*key, *values)
+
+    def get(self, key, default = None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __contains__(self, key):
+        return self.row(*key) >= 0
+
+    def __len__(self):
+        return int((self.rows >= 0).sum())
+
+
+# the merged table and the views derived from it for one version of the data file
+# one Dataset is shared read-only by every session of the process, a new version of the
+# file builds a new Dataset and each rerun keeps the one it loaded until it finishes
+class Dataset:
+    def __init__(self, version, views):
+        self.version = version
+        self.data = views['data']
+        self.living_housing_info = views['living_housing_info']
+        # aligned with the rows of data, looked up by position through profiles.row
+        self.rank_table = views['rank_table']
+        # keyed by (State, Industry) so the display functions never scan the table
+        self.profiles = ProfileStore(self.data)
+        # regions in alphabetical order, industries in the order of the data file
+        self.states = self.profiles.states
+        self.industries = list(self.data['Industry'].unique())
+        self._distributions = {}
+        self._destination_ranker = None
+        # sessions asking for a lazy view at the same time build it once
+        self._lock = threading.Lock()
+
+    # quartiles, fences and outliers of living_housing_info columns, computed once per version
+    def distribution(self, attributes):
+        key = tuple(attributes)
+        stats = self._distributions.get(key)
+        if stats is None:
+            with self._lock:
+                stats = self._distributions.get(key)
+                if stats is None:
+                    stats = distribution_stats(self.living_housing_info, key)
+                    self._distributions[key] = stats
+        return stats
+
+    # state x state x industry difference matrices for destination ranking, built on first use
+    def destination_ranker(self):
+        if self._destination_ranker is None:
+            with self._lock:
+                if self._destination_ranker is None:
+                    self._destination_ranker = DestinationRanker(self.data)
+        return self._destination_ranker
+
+
+# return the stat key used to detect that the data file changed on disk
+def _stat_key(path):
+    stat = os.stat(path)
+    return stat.st_mtime_ns, stat.st_size
+
+# return a short content hash of the data file
+def file_version(path, chunk_size = 1 << 20):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for chunk in iter(lambda: file.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()[:16]
+
+# return the binary cache directory of a dataset version
+def version_dir(version, cache_dir = CACHE_DIR):
+    return os.path.join(cache_dir, f'{version}-v{CACHE_FORMAT}')
+
+# return the version recorded by DataScraping.py next to the data file,
+# None if there is no stamp or the file changed after it was written
+def stamped_version(path, key):
+    try:
+        with open(os.path.splitext(path)[0] + '.version', encoding = 'utf-8') as file:
+            stamp = json.load(file)
+    except (OSError, ValueError):
+        return None
+    if (stamp.get('mtime_ns'), stamp.get('size')) != key:
+        return None
+    return stamp.get('version')
+
+# keep one row per state with the living and housing statistics only
+def build_living_housing_info(data):
+    living_housing_info = data.drop(columns = JOB_COLUMNS)
+    living_housing_info = living_housing_info.drop_duplicates()
+    return living_housing_info.reset_index(drop = True)
+
+# rank every region within its industry for each metric, 1 being the highest value
+def build_rank_table(data):
+    by_industry = data.groupby('Industry', observed = True)
+    ranks = by_industry[RANK_METRICS].rank(ascending = False, method = 'first')
+    rank_table = data[KEY_COLUMNS].join(ranks.astype('int32'))
+    # number of regions ranked in the industry, used to label the ranks
+    rank_table['Regions'] = by_industry['State'].transform('size').astype('int32')
+    return rank_table
+
+# read all views of a version from the binary cache, None if any is missing
+def _read_binary(directory):
+    views = {}
+    try:
+        for view in VIEWS:
+            views[view] = pd.read_parquet(os.path.join(directory, view + '.parquet'))
+    except (ImportError, OSError, ValueError):
+        # no parquet engine installed or the cache is incomplete
+        return None
+    return views
+
+# write all views of a version to the binary cache, skipped without a parquet engine
+def _write_binary(directory, views):
+    try:
+        os.makedirs(directory, exist_ok = True)
+        for view, frame in views.items():
+            # write to a temporary file first so readers never see a partial file
+            with atomic_write(os.path.join(directory, view + '.parquet'), 'wb') as file:
+                frame.to_parquet(file, index = False)
+    except (ImportError, OSError, ValueError):
+        pass
+
+# parse the csv and build the derived views
+def _build_views(path):
+    # typed by Schema.py: category keys keep the region and occupation keys small at metro and county scale
+    data = read_typed_csv(path)
+    return {'data': data, 'living_housing_info': build_living_housing_info(data), 'rank_table': build_rank_table(data)}
+
+# load the dataset for the data file, reusing the in-process copy while the file is unchanged
+def load_dataset(path = DATA_FILE, cache_dir = CACHE_DIR):
+    key = _stat_key(path)
+    cached = _datasets.get(path)
+    if cached is not None and cached[0] == key:
+        return cached[1]
+
+    with _lock:
+        # another session may have finished loading while we waited
+        cached = _datasets.get(path)
+        if cached is not None and cached[0] == key:
+            return cached[1]
+
+        version = stamped_version(path, key) or file_version(path)
+        if cached is not None and cached[1].version == version:
+            # file touched but content unchanged
+            dataset = cached[1]
+        else:
+            views = _read_binary(version_dir(version, cache_dir))
+            if views is None:
+                views = _build_views(path)
+                _write_binary(version_dir(version, cache_dir), views)
+            dataset = Dataset(version, views)
+        _datasets[path] = (key, dataset)
+        return dataset
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Destinations.py
+Purpose:
+    Answer "where should I move?" for an origin state and industry.
+    DestinationRanker precomputes, once per dataset version, the
+    state x state x industry difference matrices of wage, employment,
+    cost of living index and median home price as NumPy arrays.
+    The ranker is shared read-only by every session. Each user gets a
+    DestinationScorer that only holds their weights and the scores of
+    the origin they are looking at, which are updated in place when
+    one weight changes, and returns the top-k destinations with a
+    partial sort.
+    The matrices grow with the square of the number of regions, so
+    above MAX_DENSE_CELLS (metro or county tables) only the values
+    are kept and the row of one origin is computed when it is asked for.
+
+Python Group C2
+    @author 1: Anni Kang;          andrew id: annik
+    @author 2: Harshita Agrawal;   andrew id: hagrawa2
+    @author 3: Yingyuan Lin;       andrew id: yingyual
+    @author 4: Zheyu Yan;          andrew id: zheyuyan
+"""
+
+import numpy as np
+import pandas as pd
+
+from Schema import DECIMALS, MERGED_SCHEMA
+
+# metrics used to score a move and whether an increase is good (+1) or bad (-1)
+DESTINATION_METRICS = {
+    'Annual Mean Wage': 1,
+    'Employment': 1,
+    'Index': -1,
+    'Median Home Price': -1,
+}
+
+# weight of every metric before the user moves a slider
+DEFAULT_WEIGHTS = {metric: 1.0 for metric in DESTINATION_METRICS}
+
+# decimals of the score shown next to the destinations
+SCORE_DECIMALS = 3
+
+# largest metric x industry x origin x destination matrix that is precomputed
+MAX_DENSE_CELLS = 20_000_000
+
+
+# difference matrices of every metric between all pairs of states, per industry
+class DestinationRanker:
+    def __init__(self, data, metrics = DESTINATION_METRICS, max_dense_cells = MAX_DENSE_CELLS):
+        self.metrics = list(metrics)
+        # category codes index the arrays directly, no per-row dictionary lookups
+        states = data['State'].astype('category')
+        industries = data['Industry'].astype('category')
+        self.states = np.asarray(states.cat.categories)
+        self.industries = list(industries.cat.categories)
+        self._state_index = {state: i for i, state in enumerate(self.states)}
+        self._industry_index = {industry: i for i, industry in enumerate(self.industries)}
+
+        # values[m, i, s]: metric m of state s in industry i, NaN where missing
+        values = np.full((len(self.metrics), len(self.industries), len(self.states)), np.nan, dtype = np.float32)
+        rows = industries.cat.codes.to_numpy()
+        columns = states.cat.codes.to_numpy()
+        for m, metric in enumerate(self.metrics):
+            values[m, rows, columns] = data[metric].to_numpy(dtype = np.float32)
+        self.values = values
+        # scale by the spread across states so weights of different units are comparable
+        scale = np.nanstd(values, axis = 2, keepdims = True)
+        scale[~(scale > 0)] = 1
+        self.scale = scale
+        self.signs = np.array([metrics[metric] for metric in self.metrics], dtype = np.float32)
+
+        self.dense = values.size * len(self.states) <= max_dense_cells
+        if self.dense:
+            # differences[m, i, origin, destination] = destination value - origin value
+            self.differences = values[:, :, np.newaxis, :] - values[:, :, :, np.newaxis]
+            contributions = self.signs[:, None, None, None] * self.differences / scale[..., np.newaxis]
+            # a move with missing data can never rank
+            self.valid = ~np.isnan(contributions).any(axis = 0)
+            self.contributions = np.nan_to_num(contributions, nan = 0.0).astype(np.float32)
+        # shared by every session, so no session may write to it
+        shared = [self.values, self.scale, self.signs]
+        if self.dense:
+            shared += [self.differences, self.contributions, self.valid]
+        for array in shared:
+            array.flags.writeable = False
+
+    # return the differences, contributions and validity of every destination from one origin
+    def origin_row(self, i, o):
+        if self.dense:
+            return self.differences[:, i, o], self.contributions[:, i, o], self.valid[i, o]
+        differences = self.values[:, i] - self.values[:, i, o, np.newaxis]
+        contributions = self.signs[:, None] * differences / self.scale[:, i]
+        valid = ~np.isnan(contributions).any(axis = 0)
+        return differences, np.nan_to_num(contributions, nan = 0.0), valid
+
+    # return a scorer with its own weights, the ranker itself is shared read-only
+    def scorer(self, weights = None):
+        return DestinationScorer(self, weights or DEFAULT_WEIGHTS)
+
+
+# weighted destination scores of one user, updated incrementally when a weight moves
+# only the scores of the last origin are kept, so a session costs one row, not a matrix
+class DestinationScorer:
+    def __init__(self, ranker, weights):
+        self.ranker = ranker
+        self.weights = {metric: float(weights.get(metric, 0)) for metric in ranker.metrics}
+        self._origin = None
+        self._scores = None
+
+    # change one weight, only its own contribution is added to the scores
+    def set_weight(self, metric, weight):
+        weight = float(weight)
+        old = self.weights[metric]
+        if weight == old:
+            return
+        if self._scores is not None:
+            contributions = self.ranker.origin_row(*self._origin)[1]
+            self._scores += np.float32(weight - old) * contributions[self.ranker.metrics.index(metric)]
+        self.weights[metric] = weight
+
+    # change several weights
+    def set_weights(self, weights):
+        for metric, weight in weights.items():
+            self.set_weight(metric, weight)
+
+    # return the weighted scores of every destination from an origin
+    def _origin_scores(self, i, o, contributions):
+        if self._origin != (i, o):
+            weights = np.array([self.weights[metric] for metric in self.ranker.metrics], dtype = np.float32)
+            self._scores = (weights @ contributions).astype(np.float32)
+            self._origin = (i, o)
+        return self._scores
+
+    # return the k best destinations from the origin with their score and metric changes
+    def top(self, origin, industry, k = 10):
+        ranker = self.ranker
+        i = ranker._industry_index[industry]
+        o = ranker._state_index[origin]
+        differences, contributions, valid = ranker.origin_row(i, o)
+        row = self._origin_scores(i, o, contributions).copy()
+        row[~valid] = -np.inf
+        row[o] = -np.inf
+        k = min(k, len(row) - 1)
+        if k <= 0:
+            return pd.DataFrame(columns = ['State', 'Score'] + ranker.metrics)
+        # partial sort: only the k best are ordered
+        best = np.argpartition(-row, k - 1)[:k]
+        best = best[np.argsort(-row[best], kind = 'stable')]
+        best = best[np.isfinite(row[best])]
+        result = pd.DataFrame({'State': ranker.states[best], 'Score': row[best].astype(float).round(SCORE_DECIMALS)})
+        for m, metric in enumerate(ranker.metrics):
+            # the float32 differences are rounded to the decimals of the schema, like ProfileStore does
+            change = differences[m, best].astype(float)
+            if MERGED_SCHEMA.get(metric, '').startswith('int'):
+                change = change.round().astype(np.int64)
+            else:
+                change = change.round(DECIMALS.get(metric, SCORE_DECIMALS))
+            result[metric] = change
+        return result
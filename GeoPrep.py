@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+GeoPrep.py
+Purpose:
+    Offline build step for the state boundaries shown on the
+    dashboard map. The full us-state-boundaries.geojson is
+    simplified (Douglas-Peucker) and quantized at a few
+    zoom-appropriate tolerances and written as compact GeoJSON
+    files under geo/. MoveWise.py loads the variant that matches
+    its zoom level instead of the full 2 MB file.
+    Run `python GeoPrep.py` after the boundaries file changes.
+
+Python Group C2
+    @author 1: Anni Kang;          andrew id: annik
+    @author 2: Harshita Agrawal;   andrew id: hagrawa2
+    @author 3: Yingyuan Lin;       andrew id: yingyual
+    @author 4: Zheyu Yan;          andrew id: zheyuyan
+"""
+
+import argparse
+import json
+import os
+
+import numpy as np
+
+from AtomicFile import atomic_write
+
+SOURCE_FILE = 'us-state-boundaries.geojson'
+OUTPUT_DIR = 'geo'
+
+# zoom level -> (simplification tolerance in degrees, decimals kept)
+# at zoom 4 one screen pixel is roughly 0.09 degrees of longitude
+ZOOM_LEVELS = {
+    4: (0.02, 2),
+    6: (0.005, 3),
+    8: (0.001, 3),
+}
+
+# feature properties needed by the map, everything else is dropped
+KEEP_PROPERTIES = ['name']
+
+
+# return the file name of the simplified boundaries for a zoom level
+def variant_path(zoom, output_dir = OUTPUT_DIR):
+    return os.path.join(output_dir, f'us-states-z{zoom}.geojson')
+
+# return the closest built variant that is at least as detailed as the zoom level,
+# falling back to the full boundaries file when none has been built
+def geometry_path(zoom, output_dir = OUTPUT_DIR, source = SOURCE_FILE):
+    for level in sorted(ZOOM_LEVELS):
+        if level >= zoom and os.path.exists(variant_path(level, output_dir)):
+            return variant_path(level, output_dir)
+    return source
+
+# keep the points of a line that are further than the tolerance from the simplified line
+def simplify_line(points, tolerance):
+    count = len(points)
+    if count <= 4:
+        return points
+    keep = np.zeros(count, dtype = bool)
+    keep[0] = keep[-1] = True
+    stack = [(0, count - 1)]
+    while stack:
+        start, end = stack.pop()
+        if end <= start + 1:
+            continue
+        inner = points[start + 1:end]
+        origin = points[start]
+        direction = points[end] - origin
+        length = np.hypot(direction[0], direction[1])
+        offset = inner - origin
+        if length == 0:
+            # closed ring: measure the distance to the shared end point
+            distance = np.hypot(offset[:, 0], offset[:, 1])
+        else:
+            distance = np.abs(direction[0] * offset[:, 1] - direction[1] * offset[:, 0]) / length
+        farthest = int(np.argmax(distance))
+        if distance[farthest] > tolerance:
+            split = start + 1 + farthest
+            keep[split] = True
+            stack.append((start, split))
+            stack.append((split, end))
+    return points[keep]
+
+# simplify and quantize one ring, None if it collapses
+def simplify_ring(ring, tolerance, decimals):
+    points = simplify_line(np.asarray(ring, dtype = float), tolerance)
+    points = np.round(points, decimals)
+    # drop consecutive duplicates created by the rounding
+    moved = np.any(np.diff(points, axis = 0) != 0, axis = 1)
+    points = points[np.concatenate(([True], moved))]
+    if len(points) < 4:
+        return None
+    return points.tolist()
+
+# simplify every polygon of a geometry, keeping at least the largest polygon of each feature
+def simplify_geometry(geometry, tolerance, decimals):
+    if geometry['type'] == 'Polygon':
+        polygons = [geometry['coordinates']]
+    else:
+        polygons = geometry['coordinates']
+
+    simplified = []
+    for polygon in polygons:
+        exterior = simplify_ring(polygon[0], tolerance, decimals)
+        if exterior is None:
+            continue
+        holes = [simplify_ring(hole, tolerance, decimals) for hole in polygon[1:]]
+        simplified.append([exterior] + [hole for hole in holes if hole is not None])
+
+    if not simplified:
+        # small islands: keep the largest polygon with rounding only
+        largest = max(polygons, key = lambda polygon: len(polygon[0]))
+        simplified = [[np.round(np.asarray(largest[0], dtype = float), decimals).tolist()]]
+    return {'type': 'MultiPolygon', 'coordinates': simplified}
+
+# build the simplified feature collection for one zoom level
+def simplify_collection(collection, tolerance, decimals):
+    features = []
+    for feature in collection['features']:
+        properties = {key: feature['properties'][key] for key in KEEP_PROPERTIES}
+        features.append({
+            'type': 'Feature',
+            'properties': properties,
+            'geometry': simplify_geometry(feature['geometry'], tolerance, decimals),
+        })
+    return {'type': 'FeatureCollection', 'features': features}
+
+# write all zoom variants and return their paths and sizes
+def build_variants(source = SOURCE_FILE, output_dir = OUTPUT_DIR, zoom_levels = ZOOM_LEVELS):
+    with open(source, encoding = 'utf-8') as file:
+        collection = json.load(file)
+    os.makedirs(output_dir, exist_ok = True)
+
+    built = []
+    for zoom, (tolerance, decimals) in sorted(zoom_levels.items()):
+        path = variant_path(zoom, output_dir)
+        simplified = simplify_collection(collection, tolerance, decimals)
+        with atomic_write(path) as file:
+            json.dump(simplified, file, separators = (',', ':'))
+        built.append((path, os.path.getsize(path)))
+    return built
+
+
+def main():
+    parser = argparse.ArgumentParser(description = 'Build simplified state boundaries for the dashboard map.')
+    parser.add_argument('--source', default = SOURCE_FILE)
+    parser.add_argument('--output-dir', default = OUTPUT_DIR)
+    args = parser.parse_args()
+
+    print(f'{args.source}: {os.path.getsize(args.source):,} bytes')
+    for path, size in build_variants(args.source, args.output_dir):
+        print(f'{path}: {size:,} bytes')
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+History.py
+Purpose:
+    Keep every refresh of the merged data as a vintage so that the
+    dashboard can show whether wages, rents and prices of a state
+    are rising. DataScraping.py appends a snapshot after each merge
+    that changed the data: one directory per vintage holding a
+    (state x industry) .npy matrix per metric, listed in a manifest.
+    Trend queries open the matrices memory-mapped and read one cell
+    of each vintage, so neither load time nor memory grows with the
+    length of the history. Older csv files can be added with:
+        python History.py old_merged_data.csv --date 2023-06-01
+
+Python Group C2
+    @author 1: Anni Kang;          andrew id: annik
+    @author 2: Harshita Agrawal;   andrew id: hagrawa2
+    @author 3: Yingyuan Lin;       andrew id: yingyual
+    @author 4: Zheyu Yan;          andrew id: zheyuyan
+"""
+
+import argparse
+import json
+import os
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from AtomicFile import atomic_directory, atomic_write
+from Schema import DECIMALS, KEY_COLUMNS, MERGED_SCHEMA, read_typed_csv
+
+HISTORY_DIR = 'history'
+MANIFEST_FILE = 'manifest.json'
+# bump when the snapshot layout changes
+HISTORY_FORMAT = 1
+
+# every numeric column of the merged data is kept, integer counts as float64 so NaN marks a missing pair
+METRICS = [column for column in MERGED_SCHEMA if column not in KEY_COLUMNS]
+# metrics shown as trend sparklines on the State Information tab
+TREND_METRICS = ['Annual Mean Wage', 'Employment', 'Median Rent', 'Median Home Price', 'Index']
+
+# days between two vintages compared by year_over_year
+YEAR = pd.Timedelta(days = 365)
+
+
+# return the file name of a metric matrix, column names hold spaces and dots
+def _metric_file(metric):
+    return metric.replace(' ', '_').replace('.', '') + '.npy'
+
+# return the dtype a metric is stored with
+def _storage_dtype(metric):
+    return np.float32 if MERGED_SCHEMA[metric] == 'float32' else np.float64
+
+# read the manifest of a history folder, an empty history if there is none
+def read_manifest(history_dir = HISTORY_DIR):
+    try:
+        with open(os.path.join(history_dir, MANIFEST_FILE), encoding = 'utf-8') as file:
+            manifest = json.load(file)
+    except (OSError, ValueError):
+        return {'format': HISTORY_FORMAT, 'vintages': []}
+    return manifest
+
+# replace the manifest atomically, readers see the old or the new list of vintages
+def _write_manifest(manifest, history_dir):
+    with atomic_write(os.path.join(history_dir, MANIFEST_FILE)) as file:
+        json.dump(manifest, file, indent = 2)
+
+# append data, a table typed by Schema.py, as a new vintage, return its manifest entry
+# a version already in the history is not stored twice
+def append_snapshot(data, version, date = None, history_dir = HISTORY_DIR):
+    manifest = read_manifest(history_dir)
+    if manifest.get('format') != HISTORY_FORMAT:
+        raise ValueError(f'{history_dir} was written with history format {manifest.get("format")}, '
+                         f'expected {HISTORY_FORMAT}')
+    for vintage in manifest['vintages']:
+        if vintage['version'] == version:
+            return vintage
+
+    states = sorted(data['State'].astype(str).unique())
+    industries = list(data['Industry'].astype(str).unique())
+    state_codes = pd.Categorical(data['State'].astype(str), categories = states).codes
+    industry_codes = pd.Categorical(data['Industry'].astype(str), categories = industries).codes
+
+    # write into a temporary folder and rename it, so a vintage is complete once it exists
+    with atomic_directory(os.path.join(history_dir, version)) as temp:
+        for metric in METRICS:
+            matrix = np.full((len(states), len(industries)), np.nan, dtype = _storage_dtype(metric))
+            matrix[state_codes, industry_codes] = data[metric].to_numpy()
+            np.save(os.path.join(temp, _metric_file(metric)), matrix)
+
+    entry = {'version': version, 'date': pd.Timestamp(date or time.strftime('%Y-%m-%d')).strftime('%Y-%m-%d'),
+             'states': states, 'industries': industries}
+    manifest['vintages'].append(entry)
+    # vintages in date order, a backfilled csv lands in its place
+    manifest['vintages'].sort(key = lambda vintage: vintage['date'])
+    _write_manifest(manifest, history_dir)
+    return entry
+
+
+# one vintage of the history, its matrices are memory-mapped on first use
+class Vintage:
+    def __init__(self, entry, history_dir):
+        self.version = entry['version']
+        self.date = pd.Timestamp(entry['date'])
+        self.directory = os.path.join(history_dir, self.version)
+        self._state_codes = {state: code for code, state in enumerate(entry['states'])}
+        self._industry_codes = {industry: code for code, industry in enumerate(entry['industries'])}
+        self._matrices = {}
+
+    # return the memory-mapped (state x industry) matrix of a metric
+    def matrix(self, metric):
+        matrix = self._matrices.get(metric)
+        if matrix is None:
+            matrix = np.load(os.path.join(self.directory, _metric_file(metric)), mmap_mode = 'r')
+            self._matrices[metric] = matrix
+        return matrix
+
+    # return the value of a metric for each state of one industry, NaN where the vintage lacks it
+    def values(self, states, industry, metric):
+        values = np.full(len(states), np.nan)
+        industry_code = self._industry_codes.get(industry)
+        if industry_code is None:
+            return values
+        codes = np.array([self._state_codes.get(state, -1) for state in states])
+        found = codes >= 0
+        # fancy indexing a memmap reads the requested cells only
+        values[found] = self.matrix(metric)[codes[found], industry_code]
+        return values
+
+
+# the vintages of a history folder, shared read-only by every session of the process
+class HistoryStore:
+    def __init__(self, manifest, history_dir = HISTORY_DIR):
+        self.vintages = [Vintage(entry, history_dir) for entry in manifest['vintages']]
+        self.dates = pd.DatetimeIndex([vintage.date for vintage in self.vintages], name = 'Date')
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.vintages)
+
+    # return the metric of several states in one industry, one row per vintage and one column per state
+    def trends(self, states, industry, metric):
+        # memmaps are opened under the lock so concurrent sessions open each file once
+        with self._lock:
+            rows = [vintage.values(states, industry, metric) for vintage in self.vintages]
+        values = np.vstack(rows) if rows else np.empty((0, len(states)))
+        return pd.DataFrame(values, index = self.dates, columns = list(states))
+
+    # return the metric of one state and industry in every vintage
+    def trend(self, state, industry, metric):
+        return self.trends([state], industry, metric)[state].rename(metric)
+
+    # return the percent change of every metric from about a year before the latest vintage,
+    # one row per metric with the latest value, the change and the values of every vintage
+    def summary(self, state, industry, metrics = TREND_METRICS):
+        rows = []
+        for metric in metrics:
+            series = self.trend(state, industry, metric).dropna()
+            # drop the float32 noise the way ProfileStore does
+            if metric in DECIMALS:
+                series = series.round(DECIMALS[metric])
+            rows.append({'Metric': metric,
+                         'Latest': series.iloc[-1] if len(series) else np.nan,
+                         'YoY Change (%)': year_over_year(series),
+                         'Trend': series.tolist()})
+        return pd.DataFrame(rows)
+
+
+# return the percent change of the latest value from the last vintage at least a year older, NaN without one
+def year_over_year(series):
+    series = series.dropna()
+    if len(series) < 2:
+        return np.nan
+    earlier = series[:series.index[-1] - YEAR]
+    if not len(earlier) or earlier.iloc[-1] == 0:
+        return np.nan
+    return float((series.iloc[-1] / earlier.iloc[-1] - 1) * 100)
+
+
+# one history store per folder, reopened when the manifest changes
+_stores = {}
+_stores_lock = threading.Lock()
+
+# return the history store of a folder, reusing the in-process copy while its manifest is unchanged
+def load_history(history_dir = HISTORY_DIR):
+    path = os.path.join(history_dir, MANIFEST_FILE)
+    try:
+        stat = os.stat(path)
+        key = stat.st_mtime_ns, stat.st_size
+    except OSError:
+        key = None
+    cached = _stores.get(history_dir)
+    if cached is not None and cached[0] == key:
+        return cached[1]
+    with _stores_lock:
+        cached = _stores.get(history_dir)
+        if cached is None or cached[0] != key:
+            cached = key, HistoryStore(read_manifest(history_dir), history_dir)
+            _stores[history_dir] = cached
+        return cached[1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description = 'Add a merged data csv to the history as a vintage.')
+    parser.add_argument('data', help = 'csv written by DataScraping.py')
+    parser.add_argument('--date', help = 'date of the vintage, YYYY-MM-DD, today by default')
+    parser.add_argument('--history-dir', default = HISTORY_DIR)
+    args = parser.parse_args()
+
+    from DataStore import file_version
+    entry = append_snapshot(read_typed_csv(args.data), file_version(args.data), args.date, args.history_dir)
+    count = len(read_manifest(args.history_dir)['vintages'])
+    print(f'{args.data}: vintage {entry["version"]} of {entry["date"]}, {count} vintages in {args.history_dir}')
+
+
+if __name__ == "__main__":
+    main()
@@ -18,58 +18,115 @@ Python Group C2
     @author 4: Zheyu Yan;          andrew id: zheyuyan
 """
 
+import os
+import uuid
+# render charts without a GUI backend, set before anything imports matplotlib
+os.environ.setdefault('MPLBACKEND', 'Agg')
+
 import streamlit as st
 import pandas as pd
-import folium
-from streamlit_folium import st_folium
-import matplotlib.pyplot as plt
-import seaborn as sns
+# folium, streamlit_folium, matplotlib and seaborn are imported by the functions that need them,
+# so a tab only pays for its own plotting stack (see benchmarks/bench_import.py)
+from DataStore import load_dataset
+from GeoPrep import geometry_path
+from Query import compare
+from Destinations import DEFAULT_WEIGHTS, DESTINATION_METRICS
+from History import load_history
+from Charts import DISTRIBUTION_ATTRIBUTES, render_distribution, render_living_cost_summary, render_state_comparison
+from Profiling import LOG_FILE, current, profile_rerun, profiling_enabled, section, timed
 
 # set the title and subtitle for the dashboard
 APP_TITLE = "MoveWise"
 APP_SUB_TITLE = 'Everything you need to know before relocating for jobs'
+# zoom level of the US map, also selects the simplified state boundaries
+MAP_ZOOM = 4
+# start the server with MOVEWISE_DEV=1 to show the developer panel, visitors cannot turn it on
+DEVELOPER_ENV = 'MOVEWISE_DEV'
 
-# create a sidebar for users to filter data by state
-def display_state_filter(df, state_name):
-    state_list = [''] + list(df['State'].unique())
-    state_list.sort()
+# create a selectbox for users to filter data by state, next to the map it follows
+# it sits in the State Information fragment, which cannot write to the sidebar
+def display_state_filter(states, state_name):
+    state_list = [''] + sorted(states)
     # if no state manually selected, the state displayed by default will be Alabama (index 1)
     state_index = state_list.index(state_name) if state_name and state_name in state_list else 1
-    return st.sidebar.selectbox('Select your State', state_list, state_index)
+    return st.selectbox('Select your State', state_list, state_index)
 
 # create a sidebar for users to filter data by industry type
-def display_industry_type_filter():
-    return st.sidebar.radio('Industry Type', ['Management', 'Business', 'CS'])
+# a selectbox stays usable with the hundreds of occupations of the metro tables
+def display_industry_type_filter(industries):
+    return st.sidebar.selectbox('Industry Type', industries)
 
-# display an US map on the dashboard
-def display_map(df):
-    # restrict map to center on the United States
-    map = folium.Map(location=[38, -96.5], zoom_start=4, scrollWheelZoom=False, tiles='CartoDB positron')
-    
-    # import geojson to create boarder for each state
+# build the state layer of the US map and the map's html once per dataset version, shared by all reruns and sessions
+# only immutable artifacts are cached: the enriched GeoJSON, the style of every state and the html,
+# a folium map is mutated when it is rendered, so every call of state_map builds its own
+# df holds one row per state, so the tooltip join below has a unique index
+# only a cache miss reaches the timed function, so the section shows when the layer is actually built
+# the layers of the current and the previous version are kept while sessions move to a new version
+@st.cache_resource(show_spinner=False, max_entries=2)
+@timed('build_state_layer')
+def build_state_layer(version, _df):
+    import folium
+
+    # import geojson to create boarder for each state, simplified for the zoom level by GeoPrep.py
+    # the choropleth is only used to color the states, its style is read out per state below
     choropleth = folium.Choropleth(
-        geo_data='us-state-boundaries.geojson',
-        data=df,
+        geo_data=geometry_path(MAP_ZOOM),
+        data=_df,
         columns=('State', 'Index'),
         key_on='feature.properties.name',
         line_opacity=0.8,
         highlight=True
     )
-    choropleth.geojson.add_to(map)
+    geojson = choropleth.geojson
 
     # display name, living cost, and median home price for each state with mouse hover
-    df_indexed = df.set_index('State')
-    for feature in choropleth.geojson.data['features']:
-        state_name = feature['properties']['name']
-        feature['properties']['living_cost'] = 'Cost of Living: ' + '{:,}'.format(df_indexed.loc[state_name, 'Index'][0]) if state_name in list(df_indexed.index) else ''
-        feature['properties']['median_home_price'] = 'Median Home Price: ' + '${:,}'.format(df_indexed.loc[state_name, 'Median Home Price'][0]) if state_name in list(df_indexed.index) else ''
-        
-    choropleth.geojson.add_child(
-        folium.features.GeoJsonTooltip(['name', 'living_cost', 'median_home_price'], labels=False)
-        )
-    
-    # set map size
-    st_map = st_folium(map, width=700, height=450)
+    # the tooltip text is formatted once per state and joined to the features by name
+    df_indexed = _df.set_index('State')
+    # the columns are float32 (Schema.py), so the decimals are given explicitly
+    living_cost = 'Cost of Living: ' + df_indexed['Index'].map('{:,.1f}'.format)
+    median_home_price = 'Median Home Price: ' + df_indexed['Median Home Price'].map('${:,.1f}'.format)
+    features = geojson.data['features']
+    names = pd.Series([feature['properties']['name'] for feature in features])
+    tooltips = pd.DataFrame({'living_cost': names.map(living_cost), 'median_home_price': names.map(median_home_price)}).fillna('')
+    for feature, properties in zip(features, tooltips.to_dict('records')):
+        feature['properties'].update(properties)
+
+    # state name -> (fill style, hover style)
+    styles = {feature['properties']['name']: (geojson.style_function(feature), geojson.highlight_function(feature))
+              for feature in features}
+    return geojson.data, styles, state_map(geojson.data, styles).get_root().render()
+
+# return a new US map showing the cached state layer, folium only reads the shared GeoJSON and styles
+def state_map(geojson, styles):
+    import folium
+
+    # restrict map to center on the United States
+    map = folium.Map(location=[38, -96.5], zoom_start=MAP_ZOOM, scrollWheelZoom=False, tiles='CartoDB positron')
+    layer = folium.GeoJson(
+        geojson,
+        style_function=lambda feature: styles[feature['properties']['name']][0],
+        highlight_function=lambda feature: styles[feature['properties']['name']][1],
+    )
+    layer.add_child(folium.features.GeoJsonTooltip(['name', 'living_cost', 'median_home_price'], labels=False))
+    layer.add_to(map)
+    return map
+
+# display an US map on the dashboard, df holds one row per state
+@timed()
+def display_map(df, version, interactive = True):
+    geojson, styles, map_html = build_state_layer(version, df)
+
+    # the overview map only shows tooltips, so the prebuilt html is enough
+    if not interactive:
+        st.iframe(map_html, width=700, height=450)
+        return ''
+
+    from streamlit_folium import st_folium
+    # set map size, only a click on a state triggers a rerun
+    # st_folium renders the map it is given, so this session gets a map of its own
+    with section('st_folium'):
+        map = state_map(geojson, styles)
+        st_map = st_folium(map, width=700, height=450, returned_objects=['last_active_drawing'], key='state_map')
 
     # a state will be returned after users click on that state
     state_name = ''
@@ -78,291 +135,270 @@ def display_map(df):
     return state_name
 
 # display the cost of living index by state and industry type as a metric
-def display_living_index(df, state_name, industry_type):
-    if state_name:
-        df = df[(df['State'] == state_name) & (df['Industry'] == industry_type)]
-        living_ind = df['Index']
-        st.metric("Cost of Living index ", living_ind)
+# profiles maps (state, industry) to a DataStore.StateProfile
+def display_living_index(profiles, state_name, industry_type):
+    profile = profiles.get((state_name, industry_type))
+    if profile is not None:
+        st.metric("Cost of Living index ", profile.index)
        
 # display the median home price of selected state as a metric  
-def display_median_home_price(df, state_name, industry_type, string_format = '${:,}'):
-    if state_name:
-        df = df[(df['State'] == state_name) & (df['Industry'] == industry_type)]
-        med_home_price = df['Median Home Price'].values[0]
-        st.metric("Median Home Price ", string_format.format(med_home_price))
+def display_median_home_price(profiles, state_name, industry_type, string_format = '${:,}'):
+    profile = profiles.get((state_name, industry_type))
+    if profile is not None:
+        st.metric("Median Home Price ", string_format.format(profile.median_home_price))
   
 # display the annual mean wage of selected state and industry type as a metric     
-def display_annual_mean_wage(df, state_name, industry_type, string_format = '${:,}'):
-    if state_name:
-        df = df[(df['State'] == state_name) & (df['Industry'] == industry_type)]
-        annual_mean_wage = df['Annual Mean Wage'].values[0]
-        st.metric("Annual Mean Wage ", string_format.format(annual_mean_wage))
+def display_annual_mean_wage(profiles, state_name, industry_type, string_format = '${:,}'):
+    profile = profiles.get((state_name, industry_type))
+    if profile is not None:
+        st.metric("Annual Mean Wage ", string_format.format(profile.annual_mean_wage))
 
 # plot various living statistics by state
-def plot_state_living_cost_summary(df, state):
-    state_data = df[df['State'] == state]
-    state_melted = pd.melt(state_data, id_vars=['State'], value_vars=[
-                           'Index', 'Grocery', 'Housing', 'Utilities', 'Transportation', 'Health', 'Misc.'])
-    plt.figure(figsize=(6, 4))
-    state_melted["value"] = state_melted["value"].astype(float)
-    sns.barplot(data=state_melted, x='variable', y='value', alpha=0.8)
-    plt.title(f'Living cost summary for {state}')
-    plt.ylabel('Value')
-    plt.xlabel('Metrics')
-    plt.xticks(rotation=45)
-    plt.tight_layout()
-    st.pyplot(plt)
-
-# compare living statistics and median rent price between two states
-def comparison_between_state(df, state1, state2):
-    selected_state = df[df['State'].isin([state1, state2])]
-    state_melted = pd.melt(selected_state, id_vars=['State'], value_vars=[
-        'Index', 'Grocery', 'Housing', 'Utilities', 'Transportation', 'Health', 'Misc.'])
-    state_melted["value"] = state_melted["value"].astype(float)
-    fig, axes = plt.subplots(nrows=2, ncols=1, figsize=(10, 10))
-    sns.barplot(data=selected_state, x='State', y='Median Rent',
-                ax=axes[0], alpha=0.8)
-    axes[0].set_title(f'Median Rent Comparison Between {state1} and {state2}')
-    plot = sns.barplot(data=state_melted, x='State', y='value', hue='variable',
-                      ax=axes[1], alpha=0.8)
-    axes[1].set_title(
-        f'Living Cost Comparison Between {state1} and {state2}')
-    plot.legend(loc='upper left', bbox_to_anchor=(1, 1), ncol=1)
-    plt.ylabel('Value')
-    plt.xlabel('Metrics')
-    plt.xticks(rotation=45)
-    plt.tight_layout()
-    st.pyplot(plt)
-
-# plot a box plot of the distribution 
-def plot_distribution(df, attributes):
-    # height in inches for each subplot
-    height_per_plot = 4  
-    fig, axes = plt.subplots(nrows=len(attributes) - 1, ncols=1, figsize=(10, height_per_plot * (len(attributes) - 1)))
-    # Enumerate through both index (counter) and value (attribute)
-    for counter, attribute in enumerate(attributes[:-1]):  
-        df[attribute] = df[attribute].astype(float)
-        sns.boxplot(df[attribute], ax=axes[counter])
-        axes[counter].set_title(f'Distribution of {attribute}')
-        # Identify outliers
-        Q1 = df[attribute].quantile(0.25)
-        Q3 = df[attribute].quantile(0.75)
-        IQR = Q3 - Q1
-        outliers = df[(df[attribute] < (Q1 - 1.5 * IQR)) | (df[attribute] > (Q3 + 1.5 * IQR))]
-        for index, row in outliers.iterrows():
-            axes[counter].text(0.3, row[attribute], row['State'], ha='center')
-    plt.tight_layout()
-    st.pyplot(plt)
-
-# compute and display the difference in employment statistics between two states
-def display_states_job_comparison(df, state1, state2, job):
-    
-    # return employment statistics by state and industry type
-    def display_job_metrics(df, state, job):
-        state_data = df[df['State'] == state]
-        state_job_data = state_data[state_data['Industry'] == job]
-        state_melted = pd.melt(state_job_data, id_vars=['State'], value_vars=[
-            'Employment', 'Median Hourly Wage', 'Mean Hourly Wage', 'Annual Mean Wage'])
-        employment_stats = str(int(state_melted["value"][0]))
-        median_hw_stats = str(state_melted["value"][1])
-        mean_hw_stats = str(state_melted["value"][2])
-        annual_mw_stats = str(state_melted["value"][3])
-        return employment_stats, median_hw_stats, mean_hw_stats, annual_mw_stats
-
-    # retrieve data for two different states
-    employment_stats1, median_hw_stats1, mean_hw_stats1, annual_mw_stats1 = display_job_metrics(df, state1, job)
-    employment_stats2, median_hw_stats2, mean_hw_stats2, annual_mw_stats2 = display_job_metrics(df, state2, job)
-    # display the statistics
-    employment_diff = str(int(employment_stats2) - int(employment_stats1))
-    median_hw_diff = str("{:.1f}".format(float(median_hw_stats2) - float(median_hw_stats1)))
-    mean_hw_diff = str("{:.1f}".format(float(mean_hw_stats2) - float(mean_hw_stats1)))
-    annual_mw_diff = str("{:.1f}".format(float(annual_mw_stats2) - float(annual_mw_stats1)))
+@timed()
+def plot_state_living_cost_summary(df, state, version):
+    st.image(render_living_cost_summary(df, state, version), width='stretch')
+
+# plot a box plot of the distribution, stats computed once per dataset version by Statistics.py
+@timed()
+def plot_distribution(stats, version):
+    st.image(render_distribution(stats, version), width='stretch')
+
+# display the change of a metric after the move as an increase or a decrease
+def display_change(label, change, string_format = '{:.1f}'):
+    if change >= 0:
+        st.metric(f"Increase in {label} After the Move", string_format.format(change))
+    else:
+        st.metric(f"Decrease in {label} After the Move", string_format.format(-change))
+
+# warn that a state and industry pair has no data, the tables of metro areas and occupations are sparse
+def display_missing_data(subject = 'one or both selected states'):
+    st.warning(f"Data not available for {subject} and industry.")
+
+# display the difference in employment statistics between two states
+# changes is the result of Query.compare for the pair, display_dashboard handles a missing pair
+@timed()
+def display_states_job_comparison(changes):
     col1, col2 = st.columns(2)
     with col1:
-        if float(employment_diff) >= 0:
-            st.metric("Increase in Employment After the Move", employment_diff)
-        if float(employment_diff) < 0:
-            st.metric("Decrease in Employment After the Move", str(abs(int(employment_diff))))
-        if float(mean_hw_diff) >= 0:
-            st.metric("Increase in Mean Hourly Wage After the Move", mean_hw_diff)
-        if float(mean_hw_diff) < 0:
-            st.metric("Decrease in Mean Hourly Wage After the Move", str(abs(float(mean_hw_diff))))
+        display_change("Employment", changes['Employment'], '{:d}')
+        display_change("Mean Hourly Wage", changes['Mean Hourly Wage'])
     with col2:
-        if float(median_hw_diff) >= 0:
-            st.metric("Increase in Median Hourly Wage After the Move", median_hw_diff)
-        if float(median_hw_diff) < 0:
-            st.metric("Decrease in Median Hourly Wage After the Move", str(abs(float(median_hw_diff))))
-        if float(annual_mw_diff) >= 0:
-            st.metric("Increase in Annual Mean Wage After the Move", annual_mw_diff)
-        if float(annual_mw_diff) < 0:
-            st.metric("Decrease in Annual Mean Wage After the Move", str(abs(float(annual_mw_diff))))
+        display_change("Median Hourly Wage", changes['Median Hourly Wage'])
+        display_change("Annual Mean Wage", changes['Annual Mean Wage'])
 
 # compare the cost of living index between two states
-def display_states_index_comparison(df, state1, state2, job):
-    # return statistics by state
-    def get_index_value(df, state, job):
-        state_data = df[(df['State'] == state) & (df['Industry'] == job)]
-        if not state_data.empty:
-            return state_data['Index'].values[0]
-        return None
-    # display statistics
-    index1 = get_index_value(df, state1, job)
-    index2 = get_index_value(df, state2, job)
-    if index1 is not None and index2 is not None:
-        index_diff = str("{:.1f}".format(index2 - index1))
-        if float(index_diff) >= 0:
-            st.metric("Increase in Cost of Living Index After the Move", index_diff)
-        else:
-            st.metric("Decrease in Cost of Living Index After the Move", str(abs(float(index_diff))))
-    else:
-        st.warning("Data not available for one or both selected states and industry.")
+def display_states_index_comparison(changes):
+    display_change("Cost of Living Index", changes['Index'])
 
 # compare the median home price statistics between two states  
-def display_states_mhp_comparison(df, state1, state2, job):
-    state_data1 = df[df['State'] == state1]
-    state_job_data1 = state_data1[state_data1['Industry'] == job]
-    state_melted1 = pd.melt(state_job_data1, id_vars=['State'], value_vars=[
-                            'Median Rent', 'Rental Vacancy', 'Occupied Housing Units', 'Median Home Price'])
-    state_data2 = df[df['State'] == state2]
-    state_job_data2 = state_data2[state_data2['Industry'] == job]
-    state_melted2 = pd.melt(state_job_data2, id_vars=['State'], value_vars=[
-                            'Median Rent', 'Rental Vacancy', 'Occupied Housing Units', 'Median Home Price'])
-    mhp_diff = str("{:.1f}".format(float(state_melted2['value'][3]) - float(state_melted1['value'][3])))
-    if float(mhp_diff) >= 0:
-        st.metric("Increase in Median Home Price After the Move", mhp_diff)
-    if float(mhp_diff) < 0:
-        st.metric("Decrease in Median Home Price After the Move", str(abs(float(mhp_diff))))
+def display_states_mhp_comparison(changes):
+    display_change("Median Home Price", changes['Median Home Price'])
  
 # create a barplot that displays the difference in statistics between two states    
-def comparision_between_state(df, state1, state2):
-    selected_state = df[df['State'].isin([state1, state2])]
-    state_melted = pd.melt(selected_state, id_vars= ['State'], value_vars = [ 
-    'Index', 'Grocery', 'Housing',
-    'Utilities', 'Transportation', 'Health', 'Misc.'])
-    state_melted["value"] = state_melted["value"].astype(float)
-    fig, axes = plt.subplots(nrows=2, ncols=1, figsize=(10, 10))
-    sns.barplot(data = selected_state, x='State', y='Median Rent', ax=axes[0], alpha = 0.8)
-    axes[0].set_title(f'Median Rent Comparison Between {state1} and {state2}')
-    plot = sns.barplot(data = state_melted, x='State', y='value', hue = 'variable', ax = axes[1], alpha = 0.8)
-    axes[1].set_title(f'Living Cost Comparision Between {state1} and {state2}')
-    plot.legend(loc='upper left', bbox_to_anchor=(1,1), ncol=1)
-    plt.ylabel('Value')
-    plt.xlabel('Metrics')
-    plt.xticks(rotation=45)
-    plt.tight_layout()
-    st.pyplot(plt)
+@timed()
+def comparision_between_state(df, state1, state2, version):
+    st.image(render_state_comparison(df, state1, state2, version), width='stretch')
     
 # display the employment statistics by state and industry type
-def display_state_job_summary(df, state, job):
-    if state:
-        state_data = df[df['State'] == state]
-        state_job_data = state_data[state_data['Industry'] == job]
-        state_melted = pd.melt(state_job_data, id_vars= ['State'], value_vars = [ 
-        'Employment', 'Median Hourly Wage', 'Mean Hourly Wage',
-        'Annual Mean Wage'])
-        employment_stats = str(int(state_melted["value"][0]))
-        median_hw_stats = str(state_melted["value"][1])
-        mean_hw_stats = str(state_melted["value"][2])
-        annual_mw_stats = str(state_melted["value"][3])
-        
-        job_data = df[df['Industry'] == job]
-        rank_employment_df = job_data.sort_values('Employment')
-        rank_employment_df = rank_employment_df.reset_index()
-        rank_employment_df = rank_employment_df.drop(columns = "index")
-        rank_employment_df = rank_employment_df[rank_employment_df['State'] == state]
-        rank_employment = str(51 - int(rank_employment_df.index.tolist()[0]))
-
-        rank_MedianHW_df = job_data.sort_values('Mean Hourly Wage')
-        rank_MedianHW_df = rank_MedianHW_df.reset_index()
-        rank_MedianHW_df = rank_MedianHW_df.drop(columns = "index")
-        rank_MedianHW_df = rank_MedianHW_df[rank_MedianHW_df['State'] == state]
-        rank_MedianHW = str(51 - int(rank_MedianHW_df.index.tolist()[0]))
+@timed()
+def display_state_job_summary(profiles, rank_table, state, job):
+    # -1 when the pair is missing, iloc would silently read the last row
+    row = profiles.row(state, job)
+    if row >= 0:
+        # the profile already holds typed python numbers (Schema.py), st.metric formats them
+        profile = profiles[(state, job)]
         
-        rank_MeanHW_df = job_data.sort_values('Median Hourly Wage')
-        rank_MeanHW_df = rank_MeanHW_df.reset_index()
-        rank_MeanHW_df = rank_MeanHW_df.drop(columns = "index")
-        rank_MeanHW_df = rank_MeanHW_df[rank_MeanHW_df['State'] == state]
-        rank_MeanHW = str(51 - int(rank_MeanHW_df.index.tolist()[0]))
-
-        rank_Annual_MW_df = job_data.sort_values('Median Hourly Wage')
-        rank_Annual_MW_df = rank_Annual_MW_df.reset_index()
-        rank_Annual_MW_df = rank_Annual_MW_df.drop(columns = "index")
-        rank_Annual_MW_df = rank_Annual_MW_df[rank_Annual_MW_df['State'] == state]
-        rank_Annual_MW = str(51 - int(rank_Annual_MW_df.index.tolist()[0]))
+        # ranks are precomputed per industry at load time by DataStore.build_rank_table
+        # and share the row positions of the merged table
+        ranks = rank_table.iloc[row]
+        regions = ranks['Regions']
         
         col1, col2, col3, col4= st.columns(4)
         with col1:
-            st.metric("Employment", employment_stats,"Rank in all states: " + rank_employment)
+            st.metric("Employment", profile.employment, f"Rank in all states: {ranks['Employment']} of {regions}")
         with col2:
-            st.metric("Median Hourly Wage($)", median_hw_stats,"Rank in all states: " + rank_MedianHW)
+            st.metric("Median Hourly Wage($)", profile.median_hourly_wage, f"Rank in all states: {ranks['Median Hourly Wage']} of {regions}")
         with col3:
-            st.metric("Mean Hourly Wage($)", mean_hw_stats,"Rank in all states: " + rank_MeanHW)
+            st.metric("Mean Hourly Wage($)", profile.mean_hourly_wage, f"Rank in all states: {ranks['Mean Hourly Wage']} of {regions}")
         with col4:
-            st.metric("Annual Mean Wage($)", annual_mw_stats,"Rank in all states: " + rank_Annual_MW)
+            st.metric("Annual Mean Wage($)", profile.annual_mean_wage, f"Rank in all states: {ranks['Annual Mean Wage']} of {regions}")
 
 
+# show the trend of the main metrics of a state over every vintage of the history as sparklines
+@timed()
+def display_state_trends(history, state, job):
+    if not state:
+        return
+    if len(history) < 2:
+        st.caption('Trends appear once the data has been refreshed more than once (see History.py).')
+        return
+    # the history reads one cell per vintage from its memory-mapped snapshots
+    summary = history.summary(state, job)
+    st.dataframe(summary, hide_index = True, column_config = {
+        'Latest': st.column_config.NumberColumn(format = '%.1f'),
+        'YoY Change (%)': st.column_config.NumberColumn(format = '%+.1f%%'),
+        'Trend': st.column_config.LineChartColumn(f'{history.dates[0]:%Y-%m} to {history.dates[-1]:%Y-%m}'),
+    })
 
-def main():
+
+# rank every destination from the current state by user-weighted metrics
+@timed()
+def display_best_destinations(ranker, origin, industry, top_k = 10):
+    st.subheader(f'Best Destinations From {origin}')
+    weights = {}
+    for col, metric in zip(st.columns(len(DESTINATION_METRICS)), DESTINATION_METRICS):
+        with col:
+            weights[metric] = st.slider(f'Weight of {metric}', 0.0, 5.0, DEFAULT_WEIGHTS[metric], 0.5, key = f'weight_{metric}')
+    # the scorer lives in the session, moving a slider only adds that metric's contribution
+    scorer = st.session_state.get('destination_scorer')
+    if scorer is None or scorer.ranker is not ranker:
+        scorer = ranker.scorer(weights)
+        st.session_state['destination_scorer'] = scorer
+    else:
+        scorer.set_weights(weights)
+    st.dataframe(scorer.top(origin, industry, top_k), hide_index = True)
+
+
+# return whether the developer panel is shown
+def developer_mode():
+    return os.environ.get(DEVELOPER_ENV) == '1'
+
+# profile the script or fragment rerun run inside the block as the next rerun of this session
+# the panel options are read from the widgets of the previous rerun
+def profile_session_rerun(scope = 'rerun'):
+    if 'session_id' not in st.session_state:
+        st.session_state['session_id'] = uuid.uuid4().hex[:8]
+    st.session_state['reruns'] = st.session_state.get('reruns', 0) + 1
+    return profile_rerun(st.session_state['session_id'], st.session_state['reruns'],
+                         memory = st.session_state.get('profile_memory', False),
+                         cprofile = st.session_state.get('profile_cprofile', False), scope = scope)
+
+# show the sections timed during a rerun and its cProfile summary
+def display_profile(profile):
+    st.caption(f'Rerun {profile.rerun} ({profile.scope}): {profile.seconds * 1000:.1f} ms, logged to {LOG_FILE}')
+    table = pd.DataFrame(profile.table(), columns = ['section', 'depth', 'ms', 'peak_kb'])
+    # indent nested sections under their parent
+    table['section'] = [' ' * 2 * depth + path.rsplit('/', 1)[-1] for path, depth in zip(table['section'], table['depth'])]
+    st.dataframe(table[['section', 'ms', 'peak_kb']], hide_index = True)
+    if profile.cprofile_skipped:
+        st.caption(f'cProfile not captured: {profile.cprofile_skipped}, try again on the next rerun')
+    if profile.stats_text:
+        st.caption(f'cProfile saved to {profile.stats_file}')
+        st.code(profile.stats_text)
+
+# show the sections timed during this rerun in the sidebar, with the profiling options for the next one
+def display_developer_panel(profile):
+    with st.sidebar.expander('Developer', expanded = True):
+        st.checkbox('Trace memory', key = 'profile_memory')
+        st.checkbox('Capture cProfile', key = 'profile_cprofile')
+        display_profile(profile)
+
+
+# the State Information body that depends on the selected state
+# a map click or a state pick reruns only this fragment, not the whole script
+@st.fragment
+def display_state_information(dataset, industry_type):
+    # a rerun of the fragment alone does not pass through main, so it is profiled here
+    # when the fragment runs as part of a profiled script rerun, its sections belong to that rerun
+    developer = developer_mode()
+    if current() is not None or not (developer or profiling_enabled()):
+        display_state_information_body(dataset, industry_type)
+        return
+    with profile_session_rerun('display_state_information') as profile:
+        display_state_information_body(dataset, industry_type)
+    if developer:
+        # a fragment cannot write to the sidebar panel, its profile is shown under it
+        with st.expander('Developer: fragment rerun', expanded = True):
+            display_profile(profile)
+
+def display_state_information_body(dataset, industry_type):
+    living_housing_info = dataset.living_housing_info
+    profiles = dataset.profiles
+    state_name = display_map(living_housing_info, dataset.version)
+    state_name = display_state_filter(dataset.states, state_name)
+    if state_name and (state_name, industry_type) not in profiles:
+        # the displays below skip the missing pair, the warning says why once
+        display_missing_data('the selected state')
+    st.subheader(f'{state_name} Facts')
+    col1, col2 = st.columns(2)
+    with col1:
+        display_living_index(profiles, state_name, industry_type)
+    with col2:
+        display_median_home_price(profiles, state_name, industry_type)
+
+    st.subheader(f'{state_name} {industry_type} Employment & Salary Info')
+    display_state_job_summary(profiles, dataset.rank_table, state_name, industry_type)
+
+    st.subheader(f'{state_name} {industry_type} Trends')
+    display_state_trends(load_history(), state_name, industry_type)
+
+    st.subheader(f'{state_name} Living Cost Summary')
+    plot_state_living_cost_summary(living_housing_info, state_name, dataset.version)
+
+
+def display_dashboard():
     st.set_page_config(APP_TITLE, layout = "wide")
     st.title(APP_TITLE)
     st.caption(APP_SUB_TITLE)
     
-    #load data
-    data = pd.read_csv("merged_data.csv")
-    living_housing_info = data.drop(columns = ['Industry','Employment', 'Median Hourly Wage', 'Mean Hourly Wage', 'Annual Mean Wage'])
-    living_housing_info = living_housing_info.drop_duplicates()
-    living_housing_info = living_housing_info.reset_index()
-    living_housing_info = living_housing_info.drop(columns= ["index"])
+    # load data once per process, shared by all reruns and sessions
+    with section('load_dataset'):
+        dataset = load_dataset()
+    living_housing_info = dataset.living_housing_info
+    profiles = dataset.profiles
 
     tabs = st.sidebar.radio("Choose a Tab", ["Overview", "State Information", "State Comparison"])
 
     # Tab 1: Overview
     if tabs == "Overview":
-        attributes = ['Index', 'Grocery', 'Housing','Utilities', 'Transportation', 'Health', 'Misc.']
         st.header("Overview")
-        display_map(data)
+        display_map(living_housing_info, dataset.version, interactive = False)
         st.subheader("Cost of Living Distribution")
-        plot_distribution(living_housing_info, attributes)
+        plot_distribution(dataset.distribution(DISTRIBUTION_ATTRIBUTES), dataset.version)
     
 
     # Tab 2: State Information
     elif tabs == "State Information":
         st.header("State Information")
-        state_name = display_map(data)
-        state_name = display_state_filter(data, state_name)
-        industry_type = display_industry_type_filter()
-        st.subheader(f'{state_name} Facts')
-        col1, col2 = st.columns(2)
-        with col1:
-            display_living_index(data, state_name, industry_type)
-        with col2:
-            display_median_home_price(data, state_name, industry_type)
-        
-
-        st.subheader(f'{state_name} {industry_type} Employment & Salary Info')
-        display_state_job_summary(data, state_name, industry_type)
-
-        st.subheader(f'{state_name} Living Cost Summary')
-        plot_state_living_cost_summary(living_housing_info, state_name)
+        industry_type = display_industry_type_filter(dataset.industries)
+        display_state_information(dataset, industry_type)
             
 
     # Tab 3: Comparison 
     elif tabs == "State Comparison":
         st.header("State Comparison")
-        state1 = st.sidebar.selectbox( "Select Your Current State:", data["State"].unique(), key = "option3")
-        state2 = st.sidebar.selectbox( "Select the State You Want to Move to:", data["State"].unique(), key = "option4")
-        industry_type = st.sidebar.radio("Select the Industry:", data["Industry"].unique())
+        state1 = st.sidebar.selectbox( "Select Your Current State:", dataset.states, key = "option3")
+        state2 = st.sidebar.selectbox( "Select the State You Want to Move to:", dataset.states, key = "option4")
+        industry_type = st.sidebar.selectbox("Select the Industry:", dataset.industries)
         st.subheader(f'If You Move to {state2} From {state1}')
         st.subheader(f'{industry_type} Employment & Salary Info')
-        display_states_job_comparison(data, state1, state2, industry_type)
-        col1, col2 = st.columns(2)
-        with col1:
-            st.subheader('Housing Info')
-            display_states_mhp_comparison(data, state1, state2, industry_type)
-        with col2:    
-            st.subheader('Cost of Living Info')
-            display_states_index_comparison(data, state1, state2, industry_type)
-        comparision_between_state(data, state1, state2)
+        # the differences are computed once per rerun by the headless Query module from the typed profiles
+        changes = compare(profiles, state1, state2, industry_type)
+        if changes is None:
+            display_missing_data()
+        else:
+            display_states_job_comparison(changes)
+            col1, col2 = st.columns(2)
+            with col1:
+                st.subheader('Housing Info')
+                display_states_mhp_comparison(changes)
+            with col2:    
+                st.subheader('Cost of Living Info')
+                display_states_index_comparison(changes)
+        comparision_between_state(living_housing_info, state1, state2, dataset.version)
+        display_best_destinations(dataset.destination_ranker(), state1, industry_type)
+
+
+# run the dashboard, profiling the rerun when the developer panel or MOVEWISE_PROFILE asks for it
+def main():
+    developer = developer_mode()
+    if not (developer or profiling_enabled()):
+        display_dashboard()
+        return
+    with profile_session_rerun() as profile:
+        display_dashboard()
+    if developer:
+        display_developer_panel(profile)
 
 
 if __name__ == "__main__": 
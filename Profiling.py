@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Profiling.py
+Purpose:
+    Opt-in instrumentation of the MoveWise dashboard. A rerun is
+    wrapped in profile_rerun, and the hot sections inside it (data
+    loading, the map build and st_folium round trip, the rank lookups,
+    the chart renders) are wrapped in section or timed. Every section
+    records its wall time and, when asked, its peak traced memory.
+    The events of a rerun are appended to a JSONL log, and the
+    developer panel of MoveWise.py shows them for the current rerun.
+    A rerun can also be captured with cProfile, one capture at a time
+    in the process; a rerun asking while another capture runs is
+    timed without it.
+    When no rerun is being profiled, section does nothing.
+
+Python Group C2
+    @author 1: Anni Kang;          andrew id: annik
+    @author 2: Harshita Agrawal;   andrew id: hagrawa2
+    @author 3: Yingyuan Lin;       andrew id: yingyual
+    @author 4: Zheyu Yan;          andrew id: zheyuyan
+"""
+
+import contextlib
+import cProfile
+import functools
+import io
+import json
+import os
+import pstats
+import threading
+import time
+import tracemalloc
+
+# set to 1 to profile and log every rerun of every session
+PROFILE_ENV = 'MOVEWISE_PROFILE'
+# JSONL file the events are appended to, one line per section
+LOG_FILE = '.movewise_profile.jsonl'
+# cProfile captures are saved here as .prof files
+PROFILE_DIR = '.movewise_profile'
+# functions listed in the cProfile summary
+TOP_FUNCTIONS = 20
+
+# Streamlit runs every session's script in its own thread, so the profile of a rerun is thread-local
+_local = threading.local()
+_log_lock = threading.Lock()
+# tracemalloc is process wide, it runs while any rerun traces memory
+_tracing_lock = threading.Lock()
+_tracing_reruns = 0
+# only one cProfile profiler may be active in the process (Python 3.12 raises on a second one)
+_cprofile_lock = threading.Lock()
+
+
+# sections timed during one rerun of one session
+class RerunProfile:
+    def __init__(self, session, rerun, memory = False, cprofile = False, scope = 'rerun'):
+        self.session = session
+        self.rerun = rerun
+        # 'rerun' for the whole script, the fragment name when only a fragment reran
+        self.scope = scope
+        self.memory = memory
+        self.cprofile = cprofile
+        self.started = time.time()
+        self.seconds = None
+        # one dict per finished section, children are listed before their parent
+        self.sections = []
+        # cProfile summary text and the file it was saved to
+        self.stats_text = None
+        self.stats_file = None
+        # why the cProfile capture asked for was not taken, None if it was
+        self.cprofile_skipped = None
+        self._stack = []
+
+    @contextlib.contextmanager
+    def section(self, name):
+        parent = self._stack[-1]['path'] + '/' if self._stack else ''
+        frame = {'path': parent + name, 'child_peak': 0}
+        if self.memory:
+            # the peak is global to the process, child sections hand theirs up so the parent keeps it
+            current, peak = tracemalloc.get_traced_memory()
+            if self._stack:
+                # the peak the parent reached before this child would be lost by the reset
+                self._stack[-1]['child_peak'] = max(self._stack[-1]['child_peak'], peak)
+            frame['before'] = current
+            tracemalloc.reset_peak()
+        self._stack.append(frame)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - start
+            self._stack.pop()
+            peak_kb = None
+            if self.memory:
+                peak = max(tracemalloc.get_traced_memory()[1], frame['child_peak'])
+                peak_kb = round((peak - frame['before']) / 1024, 1)
+                if self._stack:
+                    self._stack[-1]['child_peak'] = max(self._stack[-1]['child_peak'], peak)
+            self.sections.append({'section': frame['path'], 'depth': len(self._stack),
+                                  'ms': round(seconds * 1000, 3), 'peak_kb': peak_kb})
+
+    # return the sections as rows of a table in the order they started
+    def table(self):
+        return _preorder(self.sections)
+
+    # return the events of the rerun, one per section, ready to be logged
+    def events(self):
+        base = {'time': time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(self.started)),
+                'session': self.session, 'rerun': self.rerun}
+        events = [dict(base, **row) for row in self.sections]
+        events.append(dict(base, section = self.scope, depth = -1, ms = round(self.seconds * 1000, 3), peak_kb = None))
+        return events
+
+
+# return the sections in start order, a parent before its children
+def _preorder(sections):
+    ordered = []
+    # children finish first, so each finished section adopts the deeper ones recorded just before it
+    waiting = []
+    for row in sections:
+        children = []
+        while waiting and waiting[-1][0]['depth'] > row['depth']:
+            children = waiting.pop() + children
+        waiting.append([row] + children)
+    for group in waiting:
+        ordered.extend(group)
+    return ordered
+
+# start tracemalloc for a rerun, unless another rerun or the user already did
+def _start_tracing():
+    global _tracing_reruns
+    with _tracing_lock:
+        if _tracing_reruns == 0 and tracemalloc.is_tracing():
+            # started outside this module, leave it to its owner
+            return False
+        if _tracing_reruns == 0:
+            tracemalloc.start()
+        _tracing_reruns += 1
+        return True
+
+# stop tracemalloc when the last rerun tracing memory finishes
+def _stop_tracing():
+    global _tracing_reruns
+    with _tracing_lock:
+        _tracing_reruns -= 1
+        if _tracing_reruns == 0:
+            tracemalloc.stop()
+
+# return the profile of the rerun running on this thread, None if it is not profiled
+def current():
+    return getattr(_local, 'profile', None)
+
+# time a block as a section of the current rerun, does nothing when the rerun is not profiled
+def section(name):
+    profile = current()
+    if profile is None:
+        return contextlib.nullcontext()
+    return profile.section(name)
+
+# decorator timing every call of a function as a section
+def timed(name = None):
+    def decorate(func):
+        label = name or func.__name__
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with section(label):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+# return whether every rerun should be profiled
+def profiling_enabled():
+    return os.environ.get(PROFILE_ENV) == '1'
+
+# append the events of a rerun to the log file
+def write_events(profile, log_file = LOG_FILE):
+    lines = ''.join(json.dumps(event) + '\n' for event in profile.events())
+    with _log_lock:
+        with open(log_file, 'a', encoding = 'utf-8') as file:
+            file.write(lines)
+
+# save the cProfile capture of a rerun and keep a summary of its slowest functions
+def _save_stats(profile, profiler, profile_dir):
+    os.makedirs(profile_dir, exist_ok = True)
+    name = f'{time.strftime("%Y%m%d-%H%M%S", time.localtime(profile.started))}-{profile.session}-{profile.rerun}.prof'
+    profile.stats_file = os.path.join(profile_dir, name)
+    profiler.dump_stats(profile.stats_file)
+    text = io.StringIO()
+    pstats.Stats(profiler, stream = text).sort_stats('cumulative').print_stats(TOP_FUNCTIONS)
+    profile.stats_text = text.getvalue()
+
+# profile the rerun run inside the block, then log its events
+@contextlib.contextmanager
+def profile_rerun(session, rerun, memory = False, cprofile = False, log_file = LOG_FILE, profile_dir = PROFILE_DIR,
+                  scope = 'rerun'):
+    profile = RerunProfile(session, rerun, memory, cprofile, scope)
+    started_tracing = memory and _start_tracing()
+    profiler = None
+    if cprofile:
+        if _cprofile_lock.acquire(blocking = False):
+            profiler = cProfile.Profile()
+            try:
+                profiler.enable()
+            except ValueError:
+                # a profiler outside this module is already active
+                _cprofile_lock.release()
+                profiler = None
+                profile.cprofile_skipped = 'another profiler is active in the process'
+        else:
+            profile.cprofile_skipped = 'another session is capturing a profile'
+    _local.profile = profile
+    start = time.perf_counter()
+    try:
+        yield profile
+    finally:
+        if profiler is not None:
+            profiler.disable()
+            _cprofile_lock.release()
+        profile.seconds = time.perf_counter() - start
+        _local.profile = None
+        if started_tracing:
+            _stop_tracing()
+        if profiler is not None:
+            _save_stats(profile, profiler, profile_dir)
+        if log_file:
+            write_events(profile, log_file)
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Query.py
+Purpose:
+    Headless relocation queries, separate from the Streamlit GUI.
+    compare returns the same changes the State Comparison tab shows
+    for one (origin, destination, industry) case. compare_batch
+    answers many cases at once with vectorized joins, and the command
+    line streams a large csv of cases through it in chunks:
+        python Query.py cases.csv -o results.csv
+    The cases file needs origin, destination and industry columns.
+
+Python Group C2
+    @author 1: Anni Kang;          andrew id: annik
+    @author 2: Harshita Agrawal;   andrew id: hagrawa2
+    @author 3: Yingyuan Lin;       andrew id: yingyual
+    @author 4: Zheyu Yan;          andrew id: zheyuyan
+"""
+
+import argparse
+import sys
+
+import pandas as pd
+
+from DataStore import DATA_FILE, PROFILE_FIELDS, load_dataset
+from Schema import DECIMALS
+
+# statistics compared between the origin and the destination
+COMPARISON_METRICS = ['Employment', 'Median Hourly Wage', 'Mean Hourly Wage', 'Annual Mean Wage',
+                      'Median Home Price', 'Index']
+
+# columns of a batch of cases
+CASE_COLUMNS = ['origin', 'destination', 'industry']
+
+# cases read from the input file at a time
+CHUNK_SIZE = 100_000
+
+
+# return the change of every metric after moving from origin to destination, None if either is missing
+# profiles maps (state, industry) to a DataStore.StateProfile
+def compare(profiles, origin, destination, industry):
+    before = profiles.get((origin, industry))
+    after = profiles.get((destination, industry))
+    if before is None or after is None:
+        return None
+    changes = {}
+    for metric in COMPARISON_METRICS:
+        change = getattr(after, PROFILE_FIELDS[metric]) - getattr(before, PROFILE_FIELDS[metric])
+        # rounding drops the float noise of the subtraction, integer counts have no decimals
+        changes[metric] = round(change, DECIMALS[metric]) if metric in DECIMALS else change
+    return changes
+
+# return the metrics indexed by (State, Industry), the lookup table of compare_batch
+def comparison_table(data):
+    return data.set_index(['State', 'Industry'])[COMPARISON_METRICS].astype(float)
+
+# answer a frame of cases with two vectorized joins, NaN where a state or industry is unknown
+def compare_batch(table, cases):
+    def lookup(states):
+        keys = pd.MultiIndex.from_arrays([states, cases['industry']])
+        return table.reindex(keys).to_numpy()
+
+    changes = lookup(cases['destination']) - lookup(cases['origin'])
+    result = cases[CASE_COLUMNS].reset_index(drop = True)
+    for i, metric in enumerate(COMPARISON_METRICS):
+        # rounded to the decimals of the schema like compare, integer counts have none
+        result[metric + ' Change'] = changes[:, i].round(DECIMALS.get(metric, 0))
+    return result
+
+# stream the cases file through compare_batch chunk by chunk, return the number of cases
+def run_batch(table, cases_file, output, chunk_size = CHUNK_SIZE):
+    count = 0
+    for chunk in pd.read_csv(cases_file, usecols = CASE_COLUMNS, dtype = str, chunksize = chunk_size):
+        compare_batch(table, chunk).to_csv(output, index = False, header = count == 0)
+        count += len(chunk)
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description = 'Compare many (origin, destination, industry) cases at once.')
+    parser.add_argument('cases', help = "csv with origin, destination and industry columns, '-' for stdin")
+    parser.add_argument('-o', '--output', default = '-', help = "result csv, '-' for stdout")
+    parser.add_argument('--data', default = DATA_FILE)
+    parser.add_argument('--chunk-size', type = int, default = CHUNK_SIZE)
+    args = parser.parse_args()
+
+    table = comparison_table(load_dataset(args.data).data)
+    cases_file = sys.stdin if args.cases == '-' else args.cases
+    if args.output == '-':
+        count = run_batch(table, cases_file, sys.stdout, args.chunk_size)
+    else:
+        with open(args.output, 'w', newline = '', encoding = 'utf-8') as output:
+            count = run_batch(table, cases_file, output, args.chunk_size)
+    print(f'compared {count} cases', file = sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
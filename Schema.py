@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Schema.py
+Purpose:
+    Declare the columns and dtypes of merged_data.csv in one place.
+    DataScraping.py checks the merged table against the schema and
+    types it before writing, and DataStore.py reads the file with
+    the same dtypes, so the dashboard works on category keys,
+    integer counts and float32 measurements and never converts
+    types while rendering.
+
+Python Group C2
+    @author 1: Anni Kang;          andrew id: annik
+    @author 2: Harshita Agrawal;   andrew id: hagrawa2
+    @author 3: Yingyuan Lin;       andrew id: yingyual
+    @author 4: Zheyu Yan;          andrew id: zheyuyan
+"""
+
+import numpy as np
+import pandas as pd
+
+# columns of merged_data.csv in file order and their dtypes
+MERGED_SCHEMA = {
+    'State': 'category',
+    'Industry': 'category',
+    'Employment': 'int32',
+    'Median Hourly Wage': 'float32',
+    'Mean Hourly Wage': 'float32',
+    'Annual Mean Wage': 'float32',
+    'Median Rent': 'int32',
+    'Rental Vacancy': 'float32',
+    'Occupied Housing Units': 'int32',
+    'Median Home Price': 'float32',
+    'Index': 'float32',
+    'Grocery': 'float32',
+    'Housing': 'float32',
+    'Utilities': 'float32',
+    'Transportation': 'float32',
+    'Health': 'float32',
+    'Misc.': 'float32',
+}
+
+# decimals the float columns are rounded to, float32 holds them exactly enough to round back
+DECIMALS = {
+    'Median Hourly Wage': 2, 'Mean Hourly Wage': 2, 'Annual Mean Wage': 0,
+    'Rental Vacancy': 1, 'Median Home Price': 0, 'Index': 1, 'Grocery': 1,
+    'Housing': 1, 'Utilities': 1, 'Transportation': 1, 'Health': 1, 'Misc.': 1,
+}
+
+# every row is one region and industry
+KEY_COLUMNS = ['State', 'Industry']
+
+
+# raised when a table does not match the schema, the message lists every problem
+class SchemaError(ValueError):
+    pass
+
+
+# return the problems of df against the schema, an empty list if it matches
+def schema_problems(df, schema = MERGED_SCHEMA):
+    missing = [column for column in schema if column not in df.columns]
+    extra = [column for column in df.columns if column not in schema]
+    problems = []
+    if missing:
+        problems.append(f'missing columns: {missing}')
+    if extra:
+        problems.append(f'unexpected columns: {extra}')
+
+    keys = [column for column in KEY_COLUMNS if column in df.columns]
+    for column in keys:
+        if df[column].isna().any():
+            problems.append(f'{column}: empty values')
+    if len(keys) == len(KEY_COLUMNS) and df.duplicated(keys).any():
+        problems.append(f'duplicate {" and ".join(keys)} pairs')
+
+    for column, dtype in schema.items():
+        if column not in df.columns or dtype == 'category':
+            continue
+        values = pd.to_numeric(df[column], errors = 'coerce')
+        bad = values.isna() | ~np.isfinite(values)
+        if bad.any():
+            problems.append(f'{column}: {int(bad.sum())} missing or non-numeric values')
+            continue
+        if dtype.startswith('int'):
+            limits = np.iinfo(dtype)
+            if ((values % 1) != 0).any():
+                problems.append(f'{column}: fractional values in an integer column')
+            elif values.min() < limits.min or values.max() > limits.max:
+                problems.append(f'{column}: values outside the {dtype} range')
+    return problems
+
+# raise SchemaError unless df matches the schema
+def validate(df, schema = MERGED_SCHEMA):
+    problems = schema_problems(df, schema)
+    if problems:
+        raise SchemaError('merged data does not match the schema: ' + '; '.join(problems))
+
+# return df checked against the schema with its columns in schema order and typed
+def apply_schema(df, schema = MERGED_SCHEMA):
+    validate(df, schema)
+    typed = {}
+    for column, dtype in schema.items():
+        values = df[column]
+        if column in DECIMALS:
+            values = pd.to_numeric(values).round(DECIMALS[column])
+        typed[column] = values.astype(dtype)
+    return pd.DataFrame(typed)
+
+# read a csv written with the schema straight into the declared dtypes
+def read_typed_csv(path, schema = MERGED_SCHEMA):
+    try:
+        df = pd.read_csv(path, dtype = schema)
+    except (ValueError, OverflowError) as error:
+        raise SchemaError(f'{path} does not match the schema: {error}') from error
+    validate(df, schema)
+    return df[list(schema)]
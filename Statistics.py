@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Statistics.py
+Purpose:
+    Distribution statistics of the cost of living attributes shown
+    on the Overview tab. Quartiles, IQR fences and outlier masks of
+    all attributes are computed in one vectorized pass without
+    touching the caller's frame, once per dataset version, and are
+    shared by the box plots and any other consumer of the data.
+
+Python Group C2
+    @author 1: Anni Kang;          andrew id: annik
+    @author 2: Harshita Agrawal;   andrew id: hagrawa2
+    @author 3: Yingyuan Lin;       andrew id: yingyual
+    @author 4: Zheyu Yan;          andrew id: zheyuyan
+"""
+
+import numpy as np
+import pandas as pd
+
+# cost of living attributes shown on the dashboard
+COST_ATTRIBUTES = ['Index', 'Grocery', 'Housing', 'Utilities', 'Transportation', 'Health', 'Misc.']
+
+# distance of the outlier fences from the quartiles, in IQRs
+FENCE_WIDTH = 1.5
+
+
+# quartiles, fences and outliers of a set of attributes
+class DistributionStats:
+    def __init__(self, attributes, states, values, summary, outliers):
+        self.attributes = attributes
+        # State of every row, aligned with values and outliers
+        self.states = states
+        # the attributes as floats, one column per attribute
+        self.values = values
+        # one row per attribute: Q1, Median, Q3, IQR, Lower Fence, Upper Fence, Outliers
+        self.summary = summary
+        # True where a value lies outside the fences of its attribute
+        self.outliers = outliers
+
+    # return the states and values of the outliers of an attribute
+    def outlier_values(self, attribute):
+        mask = self.outliers[attribute].to_numpy()
+        return self.states[mask], self.values[attribute][mask]
+
+
+# compute the distribution statistics of the attributes of df in one pass
+def distribution_stats(df, attributes, fence_width = FENCE_WIDTH):
+    attributes = list(attributes)
+    # to_numpy copies, so the caller's frame keeps its dtypes
+    values = df[attributes].to_numpy(dtype = float)
+    # linear interpolation, the same as DataFrame.quantile
+    q1, median, q3 = np.nanpercentile(values, [25, 50, 75], axis = 0)
+    iqr = q3 - q1
+    lower = q1 - fence_width * iqr
+    upper = q3 + fence_width * iqr
+    outliers = (values < lower) | (values > upper)
+
+    summary = pd.DataFrame({
+        'Q1': q1, 'Median': median, 'Q3': q3, 'IQR': iqr,
+        'Lower Fence': lower, 'Upper Fence': upper,
+        'Outliers': outliers.sum(axis = 0),
+    }, index = attributes)
+    return DistributionStats(
+        attributes,
+        df['State'].reset_index(drop = True),
+        pd.DataFrame(values, columns = attributes),
+        summary,
+        pd.DataFrame(outliers, columns = attributes),
+    )
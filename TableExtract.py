@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+TableExtract.py
+Purpose:
+    Pull a single html table out of a scraped page without building
+    a tree of the whole document. read_table streams the page
+    through a small html.parser subclass that only keeps the cells
+    of the target table and stops once the table is closed.
+    strained_rows does the same with a BeautifulSoup SoupStrainer
+    and is kept for comparison (see benchmarks/bench_table_extract.py).
+    to_frame turns the cell text into typed columns in bulk.
+
+Python Group C2
+    @author 1: Anni Kang;          andrew id: annik
+    @author 2: Harshita Agrawal;   andrew id: hagrawa2
+    @author 3: Yingyuan Lin;       andrew id: yingyual
+    @author 4: Zheyu Yan;          andrew id: zheyuyan
+"""
+
+from html.parser import HTMLParser
+
+import pandas as pd
+
+# characters removed from a cell before it is converted to a number
+NUMBER_NOISE = r'[$,%\s]'
+
+# characters of the page fed to the parser at a time
+CHUNK_SIZE = 1 << 16
+
+
+# collect the rows of the first table matching the filters, ignoring the rest of the page
+class TableParser(HTMLParser):
+    def __init__(self, table_class = None, container_class = None):
+        super().__init__(convert_charrefs = True)
+        self.table_class = table_class
+        self.container_class = container_class
+        self.rows = []
+        self.done = False
+        # depth of open container divs and tables, 0 when outside
+        self._container_depth = 0 if container_class else 1
+        self._table_depth = 0
+        self._row = None
+        self._cell = None
+
+    def _matches(self, attrs, class_name):
+        return class_name is None or class_name in (dict(attrs).get('class') or '').split()
+
+    def handle_starttag(self, tag, attrs):
+        if self.done:
+            return
+        if tag == 'div' and self.container_class and self._table_depth == 0:
+            if self._container_depth or self._matches(attrs, self.container_class):
+                self._container_depth += 1
+        elif tag == 'table' and self._container_depth:
+            if self._table_depth or self._matches(attrs, self.table_class):
+                self._table_depth += 1
+        elif self._table_depth == 1:
+            # html lets a row or cell end where the next one starts, so close the open one first
+            if tag == 'tr':
+                self._end_row()
+                self._row = []
+            elif tag in ('td', 'th') and self._row is not None:
+                self._end_cell()
+                self._cell = []
+
+    def handle_endtag(self, tag):
+        if self.done:
+            return
+        if tag == 'table' and self._table_depth:
+            self._table_depth -= 1
+            if self._table_depth == 0:
+                self._end_row()
+                self.done = True
+        elif tag == 'div' and self._container_depth and self._table_depth == 0 and self.container_class:
+            self._container_depth -= 1
+        elif self._table_depth == 1:
+            if tag in ('td', 'th'):
+                self._end_cell()
+            elif tag == 'tr':
+                self._end_row()
+
+    def handle_data(self, data):
+        if self._cell is not None:
+            self._cell.append(data)
+
+    def _end_cell(self):
+        if self._cell is not None:
+            self._row.append(''.join(self._cell).strip())
+            self._cell = None
+
+    def _end_row(self):
+        self._end_cell()
+        if self._row:
+            self.rows.append(self._row)
+        self._row = None
+
+
+# return the rows of the target table as lists of cell text, streaming the page
+def read_table(html, table_class = None, container_class = None, chunk_size = CHUNK_SIZE):
+    parser = TableParser(table_class, container_class)
+    for start in range(0, len(html), chunk_size):
+        parser.feed(html[start:start + chunk_size])
+        if parser.done:
+            break
+    parser.close()
+    if not parser.done and not parser.rows:
+        raise ValueError('table not found')
+    return parser.rows
+
+# return the rows of the target table using a SoupStrainer that only parses the table
+def strained_rows(html, table_class = None, container_class = None, features = 'html.parser'):
+    from bs4 import BeautifulSoup, SoupStrainer
+    if container_class:
+        strainer = SoupStrainer('div', {'class': container_class})
+    else:
+        strainer = SoupStrainer('table', {'class': table_class} if table_class else {})
+    soup = BeautifulSoup(html, features, parse_only = strainer)
+    table = soup.find('table', {'class': table_class} if table_class else {})
+    if table is None:
+        raise ValueError('table not found')
+    return [[cell.get_text().strip() for cell in row.find_all(['td', 'th'])]
+            for row in table.find_all('tr')]
+
+# build a dataframe from table rows and convert the numeric columns in bulk
+def to_frame(rows, columns, numeric = (), integer = ()):
+    df = pd.DataFrame([row[:len(columns)] for row in rows], columns = columns)
+    for column in numeric:
+        cleaned = df[column].str.replace(NUMBER_NOISE, '', regex = True)
+        df[column] = pd.to_numeric(cleaned.where(cleaned != ''), errors = 'raise')
+    for column in integer:
+        df[column] = df[column].astype('int64')
+    return df
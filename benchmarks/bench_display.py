@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+bench_display.py
+Purpose:
+    Time the data loading and every display function of MoveWise.py
+    against a no-op Streamlit (stub_streamlit.py) on synthetic tables
+    of growing size (synthetic.py), and record wall time and peak
+    traced memory per call. Cached functions are measured cold (their
+    cache cleared before every call) and warm. Use --output to keep
+    the numbers for scaling curves.
+        python benchmarks/bench_display.py --sizes state metro --output scaling.csv
+
+Python Group C2
+    @author 1: Anni Kang;          andrew id: annik
+    @author 2: Harshita Agrawal;   andrew id: hagrawa2
+    @author 3: Yingyuan Lin;       andrew id: yingyual
+    @author 4: Zheyu Yan;          andrew id: zheyuyan
+"""
+
+import argparse
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+os.environ.setdefault('MPLBACKEND', 'Agg')
+
+import stub_streamlit
+
+st = stub_streamlit.install()
+
+import pandas as pd
+
+import Charts
+import DataStore
+import MoveWise
+from synthetic import SIZES, generate
+
+
+# run func repeat times, return the median seconds and the peak traced memory in MB
+# timing and tracing are separate runs because tracemalloc slows allocation-heavy code down
+def measure(func, repeat, before = None):
+    times = []
+    for _ in range(repeat):
+        if before is not None:
+            before()
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+
+    if before is not None:
+        before()
+    tracemalloc.start()
+    func()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return statistics.median(times), peak / 2**20
+
+# return (name, mode, function, cache reset) for every measured call on a dataset
+def cases(dataset):
+    data = dataset.data
+    info = dataset.living_housing_info
+    profiles = dataset.profiles
+    version = dataset.version
+    state1, state2 = info['State'].iloc[0], info['State'].iloc[1]
+    job = data['Industry'].iloc[0]
+    stats = dataset.distribution(Charts.DISTRIBUTION_ATTRIBUTES)
+    changes = MoveWise.compare(profiles, state1, state2, job)
+
+    def clear_map():
+        MoveWise.build_state_layer.clear()
+
+    def clear_charts():
+        Charts.chart_cache.clear()
+
+    calls = [
+        ('display_map', MoveWise.display_map, (info, version), clear_map),
+        ('display_state_job_summary', MoveWise.display_state_job_summary, (profiles, dataset.rank_table, state1, job), None),
+        ('display_living_index', MoveWise.display_living_index, (profiles, state1, job), None),
+        ('display_median_home_price', MoveWise.display_median_home_price, (profiles, state1, job), None),
+        ('compare', MoveWise.compare, (profiles, state1, state2, job), None),
+        ('display_states_job_comparison', MoveWise.display_states_job_comparison, (changes,), None),
+        ('display_states_index_comparison', MoveWise.display_states_index_comparison, (changes,), None),
+        ('display_states_mhp_comparison', MoveWise.display_states_mhp_comparison, (changes,), None),
+        ('plot_state_living_cost_summary', MoveWise.plot_state_living_cost_summary, (info, state1, version), clear_charts),
+        ('comparision_between_state', MoveWise.comparision_between_state, (info, state1, state2, version), clear_charts),
+        ('plot_distribution', MoveWise.plot_distribution, (stats, version), clear_charts),
+    ]
+    for name, func, args, reset in calls:
+        call = lambda func = func, args = args: func(*args)
+        if reset is not None:
+            yield name, 'cold', call, reset
+        yield name, 'warm', call, None
+
+    # above Destinations.MAX_DENSE_CELLS the ranker computes the origin row on demand
+    def best_destinations():
+        st.session_state.clear()
+        MoveWise.display_best_destinations(dataset.destination_ranker(), state1, job)
+    def clear_ranker():
+        dataset._destination_ranker = None
+    yield 'display_best_destinations', 'cold', best_destinations, clear_ranker
+    yield 'display_best_destinations', 'warm', best_destinations, None
+
+# measure loading and every display function at one size
+def bench_size(label, regions, industries, repeat, workdir):
+    path = os.path.join(workdir, f'{label}.csv')
+    cache_dir = os.path.join(workdir, 'cache')
+    generate(regions, industries).to_csv(path, index = False)
+
+    def load():
+        DataStore._datasets.clear()
+        return DataStore.load_dataset(path, cache_dir)
+
+    # csv: no binary cache yet, every view is built from the parsed csv
+    def clear_binary_cache():
+        shutil.rmtree(cache_dir, ignore_errors = True)
+
+    results = []
+    seconds, peak = measure(load, repeat, clear_binary_cache)
+    results.append(('load_dataset', 'csv', seconds, peak))
+    seconds, peak = measure(load, repeat)
+    results.append(('load_dataset', 'binary', seconds, peak))
+
+    dataset = DataStore.load_dataset(path, cache_dir)
+    for name, mode, call, reset in cases(dataset):
+        seconds, peak = measure(call, repeat, reset)
+        results.append((name, mode, seconds, peak))
+    return [{'size': label, 'regions': regions, 'industries': industries, 'rows': regions * industries,
+             'function': name, 'mode': mode, 'ms': seconds * 1000, 'peak_mb': peak}
+            for name, mode, seconds, peak in results]
+
+
+def main():
+    parser = argparse.ArgumentParser(description = 'Benchmark the dashboard display functions on synthetic data.')
+    parser.add_argument('--sizes', nargs = '+', choices = SIZES, default = ['state', 'state-wide', 'metro'])
+    parser.add_argument('--repeat', type = int, default = 3)
+    parser.add_argument('--output', help = 'also write the results to this csv')
+    args = parser.parse_args()
+
+    rows = []
+    with tempfile.TemporaryDirectory() as workdir:
+        for label in args.sizes:
+            regions, industries = SIZES[label]
+            print(f'{label}: {regions} regions x {industries} industries', file = sys.stderr)
+            rows += bench_size(label, regions, industries, args.repeat, workdir)
+
+    results = pd.DataFrame(rows)
+    with pd.option_context('display.max_rows', None, 'display.width', 200):
+        print(results.round({'ms': 2, 'peak_mb': 2}).to_string(index = False))
+    if args.output:
+        results.to_csv(args.output, index = False)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+bench_import.py
+Purpose:
+    Report the cold-start import cost of every dependency of the
+    dashboard and of MoveWise.py itself. Each module is imported in a
+    fresh interpreter with `-X importtime` and the cumulative time of
+    the top-level import is kept (best of --repeat runs). The tabs
+    that need each dependency are listed so that the lazy imports in
+    MoveWise.py and Charts.py can be checked against the numbers.
+        python benchmarks/bench_import.py
+
+Python Group C2
+    @author 1: Anni Kang;          andrew id: annik
+    @author 2: Harshita Agrawal;   andrew id: hagrawa2
+    @author 3: Yingyuan Lin;       andrew id: yingyual
+    @author 4: Zheyu Yan;          andrew id: zheyuyan
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# dependency -> tabs that import it, 'startup' when MoveWise.py imports it at module level
+DEPENDENCIES = {
+    'streamlit': 'startup',
+    'pandas': 'startup',
+    'numpy': 'startup',
+    'pyarrow': 'startup (binary cache)',
+    'folium': 'Overview, State Information (first map build)',
+    'streamlit_folium': 'State Information',
+    'matplotlib': 'all tabs (first chart render)',
+    'seaborn': 'all tabs (first chart render)',
+    'MoveWise': 'startup, total of the module-level imports',
+}
+
+
+# return the cumulative import time of a module in seconds, measured in a fresh interpreter
+def import_time(module):
+    env = dict(os.environ, MPLBACKEND = 'Agg', PYTHONPATH = ROOT)
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                            capture_output = True, text = True, env = env, cwd = ROOT)
+    if result.returncode != 0:
+        return None
+    for line in result.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        parts = line.split('|')
+        if len(parts) == 3 and parts[2].strip() == module:
+            return int(parts[1]) / 1e6
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description = 'Report the cold-start import cost per dependency.')
+    parser.add_argument('--repeat', type = int, default = 3)
+    args = parser.parse_args()
+
+    print(f'{"module":<18}{"seconds":>9}  needed by')
+    for module, needed_by in DEPENDENCIES.items():
+        times = [import_time(module) for _ in range(args.repeat)]
+        times = [seconds for seconds in times if seconds is not None]
+        seconds = f'{min(times):.3f}' if times else 'missing'
+        print(f'{module:<18}{seconds:>9}  {needed_by}')
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+bench_table_extract.py
+Purpose:
+    Compare the ways of pulling the data tables out of saved copies
+    of the two scraped pages: a full BeautifulSoup tree (the original
+    approach), a SoupStrainer that only parses the table, and the
+    streaming TableParser used by DataScraping.py. Before timing,
+    the tables parsed by DataScraping.py are checked against the
+    original scraper, which read the td cells of every row at fixed
+    offsets. The saved pages in tests/fixtures are used by default,
+    point --pages at the http cache to run on the live copies:
+        python benchmarks/bench_table_extract.py --pages .http_cache
+
+Python Group C2
+    @author 1: Anni Kang;          andrew id: annik
+    @author 2: Harshita Agrawal;   andrew id: hagrawa2
+    @author 3: Yingyuan Lin;       andrew id: yingyual
+    @author 4: Zheyu Yan;          andrew id: zheyuyan
+"""
+
+import argparse
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd
+from bs4 import BeautifulSoup
+
+from DataScraping import parse_cost_of_living, parse_rental_data
+from TableExtract import read_table, strained_rows
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'tests', 'fixtures')
+
+# page name -> table filters passed to the extractors
+TARGETS = {
+    'rental': {'table_class': 'shdb-on-page-table'},
+    'cost_of_living': {'container_class': 'table-responsive'},
+}
+
+
+# the rental table as the original scraper read it: td cells only, state to home price at offsets 1 to 5
+def original_rental_data(html):
+    soup = BeautifulSoup(html, 'html.parser')
+    table = soup.find('table', {'class': 'shdb-on-page-table'})
+    data = []
+    for row in table.find_all('tr')[1:]:
+        columns = row.find_all('td')
+        home_price = columns[5].text.strip().replace('$', '').replace(',', '')
+        data.append([columns[1].text.strip(),
+                     int(columns[2].text.strip().replace('$', '').replace(',', '')),
+                     float(columns[3].text.strip().replace('%', '')),
+                     int(columns[4].text.strip().replace(',', '')),
+                     int(home_price) if home_price else None])
+    columns = ['State', 'Median Rent Price ($)', 'Rental Vacancy Rate (%)', 'Occupied Housing Units', 'Median Home Price($)']
+    return pd.DataFrame(data, columns = columns).sort_values(by = 'State').reset_index(drop = True)
+
+# the cost of living table as the original scraper read it: th headers, td cells of every later row
+def original_cost_of_living(html):
+    soup = BeautifulSoup(html, 'html.parser')
+    table = soup.find('div', {'class': 'table-responsive'}).find('table')
+    headers = [th.text.strip() for th in table.find_all('th')]
+    data = []
+    for row in table.find_all('tr')[1:]:
+        columns = row.find_all('td')
+        data.append({headers[i]: columns[i].text.strip() for i in range(len(columns))})
+    df = pd.DataFrame(data)
+    # the original kept text, DataScraping.py types the numbers while parsing
+    numeric = [column for column in df.columns if column != 'State']
+    df[numeric] = df[numeric].apply(pd.to_numeric)
+    return df
+
+# page name -> (original parser, parser used by DataScraping.py)
+PARSERS = {
+    'rental': (original_rental_data, parse_rental_data),
+    'cost_of_living': (original_cost_of_living, parse_cost_of_living),
+}
+
+# raise unless DataScraping.py parses the page into the same table as the original scraper
+def check_parser(name, html):
+    original, current = PARSERS[name]
+    pd.testing.assert_frame_equal(current(html), original(html), check_dtype = False)
+
+
+# the original approach: parse the whole document, then find the table
+def full_dom_rows(html, table_class = None, container_class = None):
+    soup = BeautifulSoup(html, 'html.parser')
+    if container_class:
+        table = soup.find('div', {'class': container_class}).find('table')
+    else:
+        table = soup.find('table', {'class': table_class})
+    return [[cell.text.strip() for cell in row.find_all(['td', 'th'])] for row in table.find_all('tr')]
+
+# return the extractors to compare, lxml only when it is installed
+def extractors():
+    methods = {
+        'full dom (html.parser)': full_dom_rows,
+        'strainer (html.parser)': strained_rows,
+        'streaming TableParser': read_table,
+    }
+    try:
+        import lxml  # noqa: F401
+        methods['strainer (lxml)'] = lambda html, **filters: strained_rows(html, features = 'lxml', **filters)
+    except ImportError:
+        pass
+    return methods
+
+
+def main():
+    parser = argparse.ArgumentParser(description = 'Benchmark html table extraction on saved pages.')
+    parser.add_argument('--pages', default = FIXTURES_DIR, help = 'directory with rental.html and cost_of_living.html')
+    parser.add_argument('--repeat', type = int, default = 20)
+    args = parser.parse_args()
+
+    methods = extractors()
+    print(f'{"page":<16}{"method":<26}{"rows":>6}{"ms/page":>10}')
+    for name, filters in TARGETS.items():
+        with open(os.path.join(args.pages, name + '.html'), encoding = 'utf-8') as file:
+            html = file.read()
+        check_parser(name, html)
+        baseline = None
+        for method_name, method in methods.items():
+            rows = method(html, **filters)
+            # every extractor must agree with the original approach
+            baseline = baseline or rows
+            assert rows == baseline, f'{method_name} disagrees on {name}'
+            seconds = min(timeit.repeat(lambda: method(html, **filters), number = 1, repeat = args.repeat))
+            print(f'{name:<16}{method_name:<26}{len(rows):>6}{seconds * 1000:>10.2f}')
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+load_test.py
+Purpose:
+    Simulate many users of the MoveWise dashboard at the same time
+    with streamlit.testing.v1.AppTest. AppTest sets up and tears down
+    the process-wide Streamlit runtime on every run, so it cannot
+    drive several sessions from threads of one process: by default
+    every simulated session runs in its own process instead. All
+    sessions open the app together and click through the three tabs,
+    picking states, an industry and a destination weight. A rerun that
+    raises, shows an exception or times out is counted as an error and
+    the session goes on with its next step.
+    The script reports latency percentiles per action and the resident
+    memory of the session processes. Each process holds its own copy
+    of the app, its caches and AppTest's element trees, so this is the
+    memory of one isolated session process, not the memory one more
+    session adds to a shared server.
+        python benchmarks/load_test.py --sessions 20 --rounds 3 --data-dir .
+    With --shared all sessions live in this process and take turns,
+    one rerun each, as a server's sessions share its caches. The
+    script then reports the memory each session adds after the first,
+    which shows whether the dataset, the map and the destination ranker
+    are really loaded once. Reruns do not overlap in this mode, so its
+    latencies are those of one rerun at a time.
+        python benchmarks/load_test.py --shared --sessions 20 --rounds 3 --data-dir .
+
+Python Group C2
+    @author 1: Anni Kang;          andrew id: annik
+    @author 2: Harshita Agrawal;   andrew id: hagrawa2
+    @author 3: Yingyuan Lin;       andrew id: yingyual
+    @author 4: Zheyu Yan;          andrew id: zheyuyan
+"""
+
+import argparse
+import gc
+import multiprocessing
+import os
+import random
+import resource
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ.setdefault('MPLBACKEND', 'Agg')
+
+import numpy as np
+import pandas as pd
+
+APP_FILE = os.path.join(ROOT, 'MoveWise.py')
+# seconds a single rerun may take before it counts as an error
+RERUN_TIMEOUT = 120
+# seconds a session waits for the others to start
+START_TIMEOUT = 300
+PERCENTILES = [50, 90, 99]
+
+# set in every session process, all of them open the app together
+_start_barrier = None
+
+
+# return the resident memory of the process in MB, the peak if the current value is not available
+def rss_mb():
+    try:
+        with open('/proc/self/status', encoding = 'utf-8') as file:
+            for line in file:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak / 2**20 if sys.platform == 'darwin' else peak / 1024
+
+# return the widget with the given label, raising LookupError when the rerun did not show it
+def widget(elements, label):
+    for element in elements:
+        if element.label == label:
+            return element
+    raise LookupError(f'no widget labelled {label!r}')
+
+# one simulated user, keeps its AppTest (and so its session state) alive until the end of the test
+class Session:
+    def __init__(self, number, states, industries, seed):
+        from streamlit.testing.v1 import AppTest
+        self.number = number
+        self.states = states
+        self.industries = industries
+        self.random = random.Random(seed)
+        self.app = AppTest.from_file(APP_FILE, default_timeout = RERUN_TIMEOUT)
+        # (session, action, seconds, error) of every rerun
+        self.timings = []
+
+    # run one interaction and record its latency and its error, a failed step never stops the session
+    def _step(self, action, interaction = None):
+        start = time.perf_counter()
+        error = None
+        try:
+            if interaction is None:
+                self.app.run()
+            else:
+                interaction(self.app).run()
+            if len(self.app.exception):
+                error = self.app.exception[0].value
+        except Exception as exception:
+            error = f'{type(exception).__name__}: {exception}'
+        seconds = time.perf_counter() - start
+        self.timings.append((self.number, action, seconds, error))
+
+    def _tab(self, tab):
+        self._step('tab ' + tab, lambda app: widget(app.sidebar.radio, 'Choose a Tab').set_value(tab))
+
+    # open the app and click through every tab, yielding after every rerun so sessions can take turns
+    def steps(self):
+        if not self.timings:
+            yield self._step('open')
+        yield self._tab('Overview')
+
+        yield self._tab('State Information')
+        state = self.random.choice(self.states)
+        # the state selectbox sits next to the map, in the State Information fragment
+        yield self._step('pick state', lambda app: widget(app.selectbox, 'Select your State').set_value(state))
+        industry = self.random.choice(self.industries)
+        yield self._step('pick industry', lambda app: widget(app.sidebar.selectbox, 'Industry Type').set_value(industry))
+
+        yield self._tab('State Comparison')
+        origin, destination = self.random.sample(self.states, 2)
+        yield self._step('pick origin',
+                         lambda app: widget(app.sidebar.selectbox, 'Select Your Current State:').set_value(origin))
+        yield self._step('pick destination',
+                         lambda app: widget(app.sidebar.selectbox, 'Select the State You Want to Move to:').set_value(destination))
+        weight = self.random.choice([0.0, 0.5, 2.0, 5.0])
+        yield self._step('move weight', lambda app: app.slider[self.random.randrange(len(app.slider))].set_value(weight))
+
+    # run every step of one click-through
+    def round(self):
+        for _ in self.steps():
+            pass
+
+
+def _init_process(barrier):
+    global _start_barrier
+    _start_barrier = barrier
+
+# run one session in this process, return its timings and the RSS of the process before and after
+def run_session(number, states, industries, seed, rounds):
+    before = rss_mb()
+    session = Session(number, states, industries, seed)
+    try:
+        # start together so the sessions really overlap
+        _start_barrier.wait(START_TIMEOUT)
+    except threading.BrokenBarrierError:
+        pass
+    for _ in range(rounds):
+        session.round()
+    return session.timings, before, rss_mb()
+
+# run every session in its own process for the given number of rounds, all sessions at the same time
+def run_sessions(count, states, industries, seed, rounds):
+    # a fresh interpreter per session, forking would copy the parent's Streamlit state
+    context = multiprocessing.get_context('spawn')
+    barrier = context.Barrier(count)
+    with ProcessPoolExecutor(max_workers = count, mp_context = context,
+                             initializer = _init_process, initargs = (barrier,)) as executor:
+        futures = [executor.submit(run_session, number, states, industries, seed + number, rounds)
+                   for number in range(1, count + 1)]
+        results = []
+        for number, future in enumerate(futures, 1):
+            try:
+                results.append(future.result())
+            except Exception as exception:
+                # the session process itself died, every step it did not report is lost
+                error = f'{type(exception).__name__}: {exception}'
+                results.append(([(number, 'session', 0.0, error)], np.nan, np.nan))
+        return results
+
+# return the RSS in MB once the garbage of the last reruns is collected
+def settled_rss_mb():
+    gc.collect()
+    return rss_mb()
+
+# run every session in this process, the sessions take turns one rerun at a time for the given rounds
+# return the timings, the RSS once one session has warmed the shared caches and the RSS after all sessions
+def run_shared_sessions(count, states, industries, seed, rounds):
+    sessions = [Session(number, states, industries, seed + number) for number in range(1, count + 1)]
+    # the first click-through of one session loads the dataset, the map and the ranker into the caches
+    sessions[0].round()
+    one = settled_rss_mb()
+    for round_number in range(rounds):
+        # the warm-up was the first round of session 1
+        turns = [session.steps() for session in sessions if round_number or session is not sessions[0]]
+        while turns:
+            for turn in list(turns):
+                if next(turn, StopIteration) is StopIteration:
+                    turns.remove(turn)
+    timings = [timing for session in sessions for timing in session.timings]
+    return timings, one, settled_rss_mb()
+
+# return the latency percentiles of every action and of all actions, in ms
+def latency_table(timings):
+    rows = []
+    for action, group in [*timings.groupby('action', sort = False), ('all', timings)]:
+        ms = group['seconds'].to_numpy() * 1000
+        row = {'action': action, 'count': len(ms), 'errors': int(group['error'].notna().sum())}
+        for percentile, value in zip(PERCENTILES, np.percentile(ms, PERCENTILES)):
+            row[f'p{percentile}_ms'] = value
+        row['max_ms'] = ms.max()
+        rows.append(row)
+    return pd.DataFrame(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description = 'Load-test the dashboard with concurrent simulated sessions.')
+    parser.add_argument('--sessions', type = int, default = 10)
+    parser.add_argument('--rounds', type = int, default = 2, help = 'click-throughs of the three tabs per session')
+    parser.add_argument('--data-dir', default = '.', help = 'folder holding merged_data.csv, the app runs from here')
+    parser.add_argument('--seed', type = int, default = 0)
+    parser.add_argument('--output', help = 'also write every rerun latency to this csv')
+    parser.add_argument('--shared', action = 'store_true',
+                        help = 'run the sessions in turn in this process and report the memory each one adds')
+    args = parser.parse_args()
+
+    # the session processes start in this folder
+    os.chdir(args.data_dir)
+    from DataStore import load_dataset
+    dataset = load_dataset()
+    states, industries = list(dataset.states), list(dataset.industries)
+
+    start = time.perf_counter()
+    if args.shared:
+        before = settled_rss_mb()
+        shared_timings, one, after = run_shared_sessions(args.sessions, states, industries, args.seed, args.rounds)
+        results = [(shared_timings, before, after)]
+    else:
+        results = run_sessions(args.sessions, states, industries, args.seed, args.rounds)
+    elapsed = time.perf_counter() - start
+
+    timings = pd.DataFrame([timing for result in results for timing in result[0]],
+                           columns = ['session', 'action', 'seconds', 'error'])
+    table = latency_table(timings)
+    with pd.option_context('display.width', 200):
+        print(table.round(1).to_string(index = False))
+    mode = 'in turn in one process' if args.shared else 'at once, one process each'
+    print(f'\n{args.sessions} sessions x {args.rounds} rounds {mode}: {len(timings)} reruns in {elapsed:.1f} s')
+    if args.shared:
+        print(f'RSS of the process: {before:.0f} MB before the app, {one:.0f} MB once one session has warmed '
+              f'the caches, {after:.0f} MB with all {args.sessions} sessions')
+        if args.sessions > 1:
+            print(f'Marginal RSS per session after the first: {(after - one) / (args.sessions - 1):.1f} MB '
+                  f'(session state, AppTest element trees and whatever the caches do not share)')
+    else:
+        before = np.array([result[1] for result in results])
+        after = np.array([result[2] for result in results])
+        print(f'RSS of one session process, median over sessions: {np.nanmedian(before):.0f} MB before the app, '
+              f'{np.nanmedian(after):.0f} MB after its rounds (app, its caches and AppTest, not shared between sessions)')
+    errors = timings['error'].dropna()
+    if len(errors):
+        print(f'{len(errors)} reruns failed, first: {errors.iloc[0]}', file = sys.stderr)
+    if args.output:
+        timings.to_csv(args.output, index = False)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+stub_streamlit.py
+Purpose:
+    A no-op stand-in for streamlit and streamlit_folium, so that the
+    display functions of MoveWise.py can be timed without a browser
+    or a Streamlit server. Call install() before importing MoveWise.
+    Widgets return their default value, layout helpers return context
+    managers, output calls do nothing, and cache_resource memoizes on
+    its non-underscore arguments like the real one.
+
+Python Group C2
+    @author 1: Anni Kang;          andrew id: annik
+    @author 2: Harshita Agrawal;   andrew id: hagrawa2
+    @author 3: Yingyuan Lin;       andrew id: yingyual
+    @author 4: Zheyu Yan;          andrew id: zheyuyan
+"""
+
+import functools
+import inspect
+import sys
+import types
+
+
+# accepts any call, attribute access or with-block and does nothing
+class NoOp:
+    def __call__(self, *args, **kwargs):
+        return self
+
+    def __getattr__(self, name):
+        return self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+# the widgets and layout helpers that return something MoveWise.py uses
+class Widgets(NoOp):
+    def columns(self, spec, **kwargs):
+        count = spec if isinstance(spec, int) else len(spec)
+        return [NoOp() for _ in range(count)]
+
+    def selectbox(self, label, options, index = 0, **kwargs):
+        options = list(options)
+        return options[index] if options and index is not None else None
+
+    def radio(self, label, options, index = 0, **kwargs):
+        return self.selectbox(label, options, index)
+
+    def slider(self, label, min_value = None, max_value = None, value = None, step = None, **kwargs):
+        return min_value if value is None else value
+
+
+# memoize a function on its arguments, skipping the ones starting with an underscore
+def cache_resource(func = None, **kwargs):
+    if func is None:
+        return cache_resource
+
+    names = list(inspect.signature(func).parameters)
+    cache = {}
+
+    @functools.wraps(func)
+    def wrapper(*args):
+        key = tuple(arg for name, arg in zip(names, args) if not name.startswith('_'))
+        if key not in cache:
+            cache[key] = func(*args)
+        return cache[key]
+
+    wrapper.clear = cache.clear
+    return wrapper
+
+
+# build the stub streamlit module
+def _streamlit_module():
+    widgets = Widgets()
+    module = types.ModuleType('streamlit')
+    module.sidebar = widgets
+    module.session_state = {}
+    module.cache_resource = cache_resource
+    for name in ('columns', 'selectbox', 'radio', 'slider'):
+        setattr(module, name, getattr(widgets, name))
+    # everything else (metric, image, subheader, components.v1.html, ...) is a no-op
+    module.__getattr__ = lambda name: widgets
+    return module
+
+# build the stub streamlit_folium module, the map is never clicked
+def _streamlit_folium_module():
+    module = types.ModuleType('streamlit_folium')
+    module.st_folium = lambda fig, **kwargs: {'last_active_drawing': None}
+    return module
+
+# replace streamlit and streamlit_folium for every later import, return the stub streamlit module
+def install():
+    sys.modules['streamlit'] = _streamlit_module()
+    sys.modules['streamlit_folium'] = _streamlit_folium_module()
+    return sys.modules['streamlit']
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+synthetic.py
+Purpose:
+    Generate tables shaped like merged_data.csv at any scale, from
+    the real 51 states x 3 industries up to metro and county level
+    with hundreds of industries, so the dashboard can be measured
+    before the real data grows. Values are drawn from ranges close
+    to the real data and are reproducible for a given seed.
+        python benchmarks/synthetic.py --regions 400 --industries 800 -o metro.csv
+
+Python Group C2
+    @author 1: Anni Kang;          andrew id: annik
+    @author 2: Harshita Agrawal;   andrew id: hagrawa2
+    @author 3: Yingyuan Lin;       andrew id: yingyual
+    @author 4: Zheyu Yan;          andrew id: zheyuyan
+"""
+
+import argparse
+
+import numpy as np
+import pandas as pd
+
+# named sizes: (regions, industries)
+SIZES = {
+    'state': (51, 3),
+    'state-wide': (51, 100),
+    'metro': (400, 100),
+    'metro-wide': (400, 800),
+    'county': (3000, 300),
+}
+
+# cost of living columns, one value per region
+COST_COLUMNS = ['Index', 'Grocery', 'Housing', 'Utilities', 'Transportation', 'Health', 'Misc.']
+
+
+# return a merged-data-shaped table with one row per region and industry
+def generate(regions, industries, seed = 0):
+    rng = np.random.default_rng(seed)
+    region_names = np.array([f'Region {i:05d}' for i in range(regions)])
+    industry_names = np.array([f'Industry {i:04d}' for i in range(industries)])
+
+    # living and housing statistics are per region, repeated for every industry
+    per_region = {
+        'Median Rent': rng.integers(600, 2500, regions),
+        'Rental Vacancy': rng.uniform(2, 12, regions).round(1),
+        'Occupied Housing Units': rng.integers(20_000, 13_000_000, regions),
+        'Median Home Price': rng.integers(120_000, 900_000, regions).astype(float),
+    }
+    for column in COST_COLUMNS:
+        per_region[column] = rng.normal(100, 18, regions).clip(70, 200).round(1)
+
+    rows = regions * industries
+    median_hourly = rng.uniform(15, 75, rows).round(2)
+    mean_hourly = (median_hourly * rng.uniform(1.02, 1.25, rows)).round(2)
+    data = {
+        'State': np.repeat(region_names, industries),
+        'Industry': np.tile(industry_names, regions),
+        'Employment': rng.integers(500, 1_500_000, rows),
+        'Median Hourly Wage': median_hourly,
+        'Mean Hourly Wage': mean_hourly,
+        'Annual Mean Wage': (mean_hourly * 2080).round(-1),
+    }
+    for column, values in per_region.items():
+        data[column] = np.repeat(values, industries)
+    return pd.DataFrame(data)
+
+
+def main():
+    parser = argparse.ArgumentParser(description = 'Write a synthetic merged data table.')
+    parser.add_argument('--size', choices = SIZES, help = 'named size, overrides --regions and --industries')
+    parser.add_argument('--regions', type = int, default = 51)
+    parser.add_argument('--industries', type = int, default = 3)
+    parser.add_argument('--seed', type = int, default = 0)
+    parser.add_argument('-o', '--output', default = 'synthetic_merged_data.csv')
+    args = parser.parse_args()
+
+    regions, industries = SIZES[args.size] if args.size else (args.regions, args.industries)
+    generate(regions, industries, args.seed).to_csv(args.output, index = False)
+    print(f'wrote {regions * industries:,} rows to {args.output}')
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1 @@
+# lets the tests in tests/ import the modules of the project folder
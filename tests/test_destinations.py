@@ -0,0 +1,37 @@
+"""
+Tests of Destinations.py on a small hand-made table.
+"""
+
+import pandas as pd
+
+from Destinations import DestinationRanker
+
+
+def make_data():
+    return pd.DataFrame({
+        'State': ['A', 'B', 'C'],
+        'Industry': ['CS', 'CS', 'CS'],
+        'Annual Mean Wage': [90000.0, 95000.0, 80000.0],
+        'Employment': [1000, 3000, 500],
+        'Index': [91.9, 86.2, 113.6],
+        'Median Home Price': [250000.0, 200000.0, 400000.0],
+    })
+
+
+def test_changes_are_rounded_to_the_schema():
+    top = DestinationRanker(make_data()).scorer().top('A', 'CS')
+    assert list(top['State']) == ['B', 'C']
+    row = top.iloc[0]
+    # 86.2 - 91.9 in float32 is -5.700005
+    assert row['Index'] == -5.7
+    assert row['Employment'] == 2000 and top['Employment'].dtype == 'int64'
+    assert row['Annual Mean Wage'] == 5000
+
+
+def test_weight_change_updates_the_scores():
+    scorer = DestinationRanker(make_data()).scorer()
+    scorer.top('A', 'CS')
+    scorer.set_weights({'Annual Mean Wage': 0, 'Employment': 0, 'Index': 0, 'Median Home Price': 1})
+    fresh = DestinationRanker(make_data()).scorer(dict(scorer.weights)).top('A', 'CS')
+    pd.testing.assert_frame_equal(scorer.top('A', 'CS'), fresh)
+    assert list(fresh['State']) == ['B', 'C']
@@ -0,0 +1,80 @@
+"""
+Tests of the fetch layer of DataScraping.py: saved fixture pages,
+conditional requests answered with 304 Not Modified, and the fallback
+to the last good copy when a site fails. A fake session stands in
+for the web.
+"""
+
+import os
+
+import pytest
+import requests
+
+from DataScraping import SOURCES, fetch_page, fetch_pages, parse_cost_of_living, parse_rental_data
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), 'fixtures')
+
+
+class FakeResponse:
+    def __init__(self, status_code, text = '', headers = None):
+        self.status_code = status_code
+        self.text = text
+        self.headers = headers or {}
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.HTTPError(f'{self.status_code} error')
+
+
+# answers every get with the next response, or raises it if it is an exception
+class FakeSession:
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.requests = []
+
+    def get(self, url, headers = None, timeout = None):
+        self.requests.append(headers or {})
+        response = self.responses.pop(0)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+
+def test_fixture_pages_parse():
+    pages = fetch_pages(fixtures_dir = FIXTURES_DIR)
+    assert set(pages) == set(SOURCES)
+    assert all(page.origin == 'fixture' and page.changed for page in pages.values())
+    rental = parse_rental_data(pages['rental'].text)
+    cost_of_living = parse_cost_of_living(pages['cost_of_living'].text)
+    assert len(rental) == 51 and list(rental['State']) == sorted(rental['State'])
+    assert 'Puerto Rico' in set(cost_of_living['State'])
+
+
+def test_first_fetch_is_cached(tmp_path):
+    session = FakeSession(FakeResponse(200, '<html>v1</html>', {'ETag': '"v1"'}))
+    page = fetch_page(session, 'rental', 'https://example.com', cache_dir = tmp_path)
+    assert (page.origin, page.changed, page.text) == ('network', True, '<html>v1</html>')
+    assert session.requests == [{}]
+    assert (tmp_path / 'rental.html').read_text(encoding = 'utf-8') == '<html>v1</html>'
+
+
+def test_not_modified_serves_cache(tmp_path):
+    fetch_page(FakeSession(FakeResponse(200, '<html>v1</html>', {'ETag': '"v1"', 'Last-Modified': 'Mon'})),
+               'rental', 'https://example.com', cache_dir = tmp_path)
+    session = FakeSession(FakeResponse(304))
+    page = fetch_page(session, 'rental', 'https://example.com', cache_dir = tmp_path)
+    assert session.requests == [{'If-None-Match': '"v1"', 'If-Modified-Since': 'Mon'}]
+    assert (page.origin, page.changed, page.text, page.error) == ('cache', False, '<html>v1</html>', None)
+
+
+@pytest.mark.parametrize('failure', [FakeResponse(503), requests.Timeout('timed out')])
+def test_failed_site_falls_back_as_stale(tmp_path, failure):
+    fetch_page(FakeSession(FakeResponse(200, '<html>v1</html>')), 'rental', 'https://example.com', cache_dir = tmp_path)
+    page = fetch_page(FakeSession(failure), 'rental', 'https://example.com', cache_dir = tmp_path)
+    assert (page.origin, page.changed, page.text) == ('stale', False, '<html>v1</html>')
+    assert isinstance(page.error, requests.RequestException)
+
+
+def test_failed_site_without_cache_raises(tmp_path):
+    with pytest.raises(requests.HTTPError):
+        fetch_page(FakeSession(FakeResponse(500)), 'rental', 'https://example.com', cache_dir = tmp_path)
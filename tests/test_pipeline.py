@@ -0,0 +1,62 @@
+"""
+Tests of the incremental build of DataScraping.py on the fixture
+pages: the stages are skipped when nothing changed, and the current
+data is recorded in the history even when the merge stage is skipped.
+"""
+
+import os
+import shutil
+
+import pandas as pd
+import pytest
+
+from DataScraping import HISTORY_DIR, MERGED_FILE, WAGE_FILE, run_pipeline
+from History import load_history, read_manifest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FIXTURES_DIR = os.path.join(ROOT, 'tests', 'fixtures')
+
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    shutil.copy(os.path.join(ROOT, WAGE_FILE), tmp_path)
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+def test_second_run_is_up_to_date(workdir):
+    assert run_pipeline(FIXTURES_DIR) == ['rental', 'cost_of_living', 'merge', 'history']
+    assert os.path.exists(MERGED_FILE)
+    assert run_pipeline(FIXTURES_DIR) == []
+    assert len(read_manifest()['vintages']) == 1
+
+
+def test_deleted_history_is_recorded_again(workdir):
+    run_pipeline(FIXTURES_DIR)
+    version = read_manifest()['vintages'][0]['version']
+    shutil.rmtree(HISTORY_DIR)
+    # the stages are up to date, only the history is written
+    assert run_pipeline(FIXTURES_DIR) == ['history']
+    assert [vintage['version'] for vintage in read_manifest()['vintages']] == [version]
+    history = load_history()
+    assert len(history) == 1
+    assert history.trend('Alabama', 'CS', 'Employment').iloc[0] == 51990
+
+
+def test_year_over_year_summary(workdir):
+    run_pipeline(FIXTURES_DIR)
+    history = load_history()
+    assert len(history) == 1
+    summary = history.summary('Alabama', 'CS', ['Annual Mean Wage', 'Index'])
+    # one vintage has no year-old value to compare with
+    assert summary['YoY Change (%)'].isna().all()
+    # values are rounded to the schema decimals, not float32 noise
+    assert summary['Trend'].tolist()[1] == [round(summary['Latest'][1], 1)]
+
+
+def test_year_over_year_uses_the_last_vintage_a_year_older():
+    from History import year_over_year
+    series = pd.Series([100.0, 104.0, 110.0], index = pd.to_datetime(['2023-01-01', '2023-06-01', '2024-03-01']))
+    # 2023-06-01 is less than a year before 2024-03-01, so 2023-01-01 is compared
+    assert year_over_year(series) == pytest.approx(10.0)
+    assert pd.isna(year_over_year(series[:2]))
@@ -0,0 +1,68 @@
+"""
+Tests of Profiling.py: nested sections, and cProfile captures of
+reruns that overlap on different threads, as two sessions do, and
+the scope that tells a fragment rerun from a script rerun in the log.
+"""
+
+import json
+import threading
+
+from Profiling import profile_rerun, section
+
+
+def test_sections_nest(tmp_path):
+    with profile_rerun('s', 1, log_file = tmp_path / 'log.jsonl') as profile:
+        with section('outer'):
+            with section('inner'):
+                pass
+    assert [(row['section'], row['depth']) for row in profile.table()] == [('outer', 0), ('outer/inner', 1)]
+
+
+def test_overlapping_cprofile_captures(tmp_path):
+    inside = threading.Barrier(2)
+    profiles, errors = [], []
+
+    def rerun(number):
+        try:
+            with profile_rerun('s', number, cprofile = True, log_file = None, profile_dir = tmp_path) as profile:
+                # both reruns are running when each one finishes
+                inside.wait(timeout = 10)
+            profiles.append(profile)
+        except Exception as error:
+            errors.append(error)
+
+    threads = [threading.Thread(target = rerun, args = (number,)) for number in (1, 2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+    captured = [profile for profile in profiles if profile.stats_file]
+    skipped = [profile for profile in profiles if profile.cprofile_skipped]
+    assert len(captured) == 1 and len(skipped) == 1
+    # the lock is released, the next rerun captures again
+    with profile_rerun('s', 3, cprofile = True, log_file = None, profile_dir = tmp_path) as profile:
+        pass
+    assert profile.stats_file and profile.cprofile_skipped is None
+
+
+def test_parent_peak_survives_a_child_section(tmp_path):
+    with profile_rerun('s', 1, memory = True, log_file = None) as profile:
+        with section('outer'):
+            buffer = bytearray(20 * 2**20)
+            del buffer
+            with section('inner'):
+                pass
+    peaks = {row['section']: row['peak_kb'] for row in profile.table()}
+    assert peaks['outer'] > 19 * 1024
+    assert peaks['outer/inner'] < 1024
+
+
+def test_fragment_rerun_is_logged_under_its_scope(tmp_path):
+    log_file = tmp_path / 'log.jsonl'
+    with profile_rerun('s', 1, log_file = log_file, scope = 'display_state_information'):
+        with section('display_map'):
+            pass
+    events = [json.loads(line) for line in log_file.read_text().splitlines()]
+    assert [(event['section'], event['depth']) for event in events] == [('display_map', 0),
+                                                                        ('display_state_information', -1)]
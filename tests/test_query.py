@@ -0,0 +1,40 @@
+"""
+Tests of Query.py: the single and the batch comparison agree on the
+merged data built from the fixture pages.
+"""
+
+import os
+
+import pandas as pd
+import pytest
+
+from DataScraping import WAGE_FILE, merge_sources, parse_cost_of_living, parse_rental_data
+from DataStore import ProfileStore
+from Query import COMPARISON_METRICS, compare, compare_batch, comparison_table
+from Schema import apply_schema
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FIXTURES_DIR = os.path.join(ROOT, 'tests', 'fixtures')
+
+
+@pytest.fixture(scope = 'module')
+def data():
+    def page(name):
+        with open(os.path.join(FIXTURES_DIR, name + '.html'), encoding = 'utf-8') as file:
+            return file.read()
+    merged = merge_sources(parse_rental_data(page('rental')), parse_cost_of_living(page('cost_of_living')),
+                           pd.read_csv(os.path.join(ROOT, WAGE_FILE)))
+    return apply_schema(merged)
+
+
+def test_compare_matches_compare_batch(data):
+    cases = pd.DataFrame({'origin': ['Alabama', 'Ohio', 'Alabama'], 'destination': ['Texas', 'Utah', 'Nowhere'],
+                          'industry': ['CS', 'Business', 'CS']})
+    batch = compare_batch(comparison_table(data), cases)
+    profiles = ProfileStore(data)
+    for row, case in zip(batch.to_dict('records'), cases.to_dict('records')):
+        changes = compare(profiles, case['origin'], case['destination'], case['industry'])
+        if changes is None:
+            assert batch[[metric + ' Change' for metric in COMPARISON_METRICS]].iloc[2].isna().all()
+            continue
+        assert {metric: row[metric + ' Change'] for metric in COMPARISON_METRICS} == changes
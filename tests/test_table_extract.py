@@ -0,0 +1,18 @@
+"""
+Tests of the streaming TableParser of TableExtract.py.
+"""
+
+from TableExtract import read_table
+
+
+def test_rows_and_cells_without_end_tags():
+    html = '<table><tr><td>1<td>2<tr><td>3<td>4</table>'
+    assert read_table(html) == [['1', '2'], ['3', '4']]
+
+
+def test_only_the_target_table_is_read():
+    html = ('<table class="menu"><tr><td>Home</td></tr></table>'
+            '<div class="table-responsive"><table><tr><th>State</th><th>Index</th></tr>'
+            '<tr><td>Ohio<td>93.1</tr><tr><td>Utah</td><td>101.5</td></tr></table></div>')
+    rows = read_table(html, container_class = 'table-responsive')
+    assert rows == [['State', 'Index'], ['Ohio', '93.1'], ['Utah', '101.5']]